@@ -0,0 +1,105 @@
+# Per-operation latency of the tracker helpers: one connection per call with
+# default pragmas (the old helpers) vs the shared, tuned connection. The old
+# helpers run against a database left at schema version 1, the plain
+# students table they were written for, not the view that replaced it.
+#
+#   python3 benchmarks/bench_connection.py
+
+import datetime
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+OPS = 2000
+SEED_ROWS = 20000
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import success_tracker as st
+
+
+def now():
+    return datetime.datetime.now().isoformat("T", "seconds")
+
+# the helpers as they were before the shared connection
+legacy_path = None
+
+def legacy_add(name, email, major, gpa, status="active"):
+    with sqlite3.connect(legacy_path) as conn:
+        return conn.execute(
+            """INSERT INTO students(name, email, major, gpa, status, last_updated)
+            VALUES(?, ?, ?, ?, ?, ?)""", (name, email, major, gpa, status, now())
+        ).lastrowid
+
+def legacy_find(major):
+    with sqlite3.connect(legacy_path) as conn:
+        conn.row_factory = sqlite3.Row
+        return conn.execute("SELECT * FROM students WHERE major = ?", (major,)).fetchall()
+
+def legacy_update(id, gpa):
+    with sqlite3.connect(legacy_path) as conn:
+        return conn.execute(
+            "UPDATE students SET gpa = ?, last_updated = ? WHERE id = ?", (gpa, now(), id)
+        ).rowcount
+
+def legacy_delete(id):
+    with sqlite3.connect(legacy_path) as conn:
+        return conn.execute("DELETE FROM students WHERE id = ?", (id,)).rowcount
+
+
+def timed(fn, args_list):
+    samples = []
+    for args in args_list:
+        start = time.perf_counter()
+        fn(*args)
+        samples.append((time.perf_counter() - start) * 1e6)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.95)]
+
+
+def run(label, add, find, update, delete):
+    ids = list(range(1, OPS + 1))
+    results = {
+        "add": timed(add, [(f"s{i}", f"s{i}@bench.com", "cs", 3.0) for i in ids]),
+        "find-major": timed(find, [("math",)] * (OPS // 10)),
+        "update-gpa": timed(update, [(SEED_ROWS + i, 2.5) for i in ids]),
+        "delete": timed(delete, [(SEED_ROWS + i,) for i in ids]),
+    }
+    for op, (p50, p95) in results.items():
+        print(f"{label:<10} {op:<12} p50 {p50:9.1f} us   p95 {p95:9.1f} us")
+
+
+def seed(path, version):
+    conn = st.get_connection(path)
+    st.migrate(conn, version)
+    with conn:
+        conn.executemany(
+            "INSERT INTO students(name, email, major, gpa, status, last_updated) VALUES(?, ?, ?, ?, ?, ?)",
+            [(f"seed{i}", f"seed{i}@bench.com", ("cs", "cis", "math")[i % 3], (i % 40) / 10, "active", now())
+             for i in range(SEED_ROWS)]
+        )
+    st.close_connections()
+
+
+def main():
+    global legacy_path
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        legacy_path = os.path.join(tmp_dir, "legacy.db")
+        st.DB_PATH = os.path.join(tmp_dir, "bench.db")
+        seed(legacy_path, 1)
+        seed(st.DB_PATH, None)
+
+        # before: default journal mode, so switch the file back from WAL first
+        with sqlite3.connect(legacy_path) as legacy_conn:
+            legacy_conn.execute("PRAGMA journal_mode = DELETE")
+        run("before", legacy_add, legacy_find, legacy_update, legacy_delete)
+
+        run("after", st.add_student, st.find_students_in_major, st.update_student_gpa, st.delete_student)
+        st.close_connections()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+# Import throughput by number of validation workers: writes one synthetic
+# CSV and imports it into a fresh database once per worker count. Only
+# validation runs in the workers, the insert stays in one process, so the
+# rate stops rising once that single writer is the bottleneck.
+#
+#   python3 benchmarks/bench_import.py --rows 200000 --workers 1,2,4,8
+
+import argparse
+import csv
+import os
+import sys
+import tempfile
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+import success_tracker as st
+from synth import generate_students
+
+
+def run(tmp_dir, source, workers):
+    st.close_connections()
+    st.DB_PATH = os.path.join(tmp_dir, f"import_{workers}.db")
+    st.migrate(st.get_connection())
+    imported, _, elapsed = st.import_students(source, workers=workers)
+    return imported, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--workers", type=str, default="1,2,4,8")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        source = os.path.join(tmp_dir, "students.csv")
+        with open(source, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(["name", "email", "major", "gpa", "status"])
+            writer.writerows(row[:5] for row in generate_students(args.rows))
+
+        baseline = None
+        for workers in (int(w) for w in args.workers.split(",")):
+            imported, elapsed = run(tmp_dir, source, workers)
+            rate = imported / elapsed
+            baseline = baseline or rate
+            print(f"{workers:>3} workers  {rate:10,.0f} rows/s  {rate / baseline:5.2f}x")
+        st.close_connections()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+# Compares the row-per-text schema (version 5) against the dictionary-encoded
+# STRICT schema (version 6): seeds one synthetic database, measures file size
+# and query latency, migrates it in place, vacuums and measures again.
+#
+#   python3 benchmarks/bench_schema.py --rows 100000
+
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+import success_tracker as st
+from synth import MAJORS, seed_database
+
+READS = ["list", "list-status", "find-major", "find-major-status", "stats-min-major"]
+
+
+def size_report(conn):
+    conn.execute("VACUUM")
+    page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+    pages = conn.execute("PRAGMA page_count").fetchone()[0]
+    tables = {}
+    try:
+        rows = conn.execute("SELECT name, SUM(pgsize) FROM dbstat GROUP BY name")
+        tables = {name: size for name, size in rows}
+    except sqlite3.OperationalError:
+        # dbstat is a compile time option, the totals are still exact
+        pass
+    return page_size * pages, pages, tables
+
+
+def read_params(name, rng):
+    params = {
+        "list": lambda: (100,),
+        "list-status": lambda: ("probation", 100),
+        "find-major": lambda: (rng.choice(MAJORS), 100),
+        "find-major-status": lambda: (rng.choice(MAJORS), "active", 100),
+        "stats-min-major": lambda: (rng.choice(MAJORS),),
+    }
+    return params[name]
+
+
+def time_reads(conn, ops, seed):
+    rng = random.Random(seed)
+    results = {}
+    for name in READS:
+        make = read_params(name, rng)
+        samples = []
+        for _ in range(ops):
+            args = make()
+            start = time.perf_counter()
+            conn.execute(st.QUERIES[name], args).fetchall()
+            samples.append((time.perf_counter() - start) * 1e6)
+        samples.sort()
+        results[name] = samples[len(samples) // 2]
+    return results
+
+
+def time_updates(conn, table, rows, ops, seed):
+    rng = random.Random(seed)
+    params = [(rng.randint(0, 40) / 10, rng.randint(1, rows)) for _ in range(ops)]
+    start = time.perf_counter()
+    with conn:
+        conn.executemany(f"UPDATE {table} SET gpa = ? WHERE id = ?", params)
+    return (time.perf_counter() - start) * 1e6 / ops
+
+
+def measure(conn, table, rows, ops):
+    total, pages, tables = size_report(conn)
+    timings = time_reads(conn, ops, seed=1)
+    timings["update-gpa"] = time_updates(conn, table, rows, ops, seed=2)
+    return total, pages, tables, timings
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--ops", type=int, default=500)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        conn = sqlite3.connect(os.path.join(tmp_dir, "schema.db"))
+        st.migrate(conn, 5)
+        seed_database(conn, args.rows)
+        before = measure(conn, "students", args.rows, args.ops)
+
+        start = time.perf_counter()
+        st.migrate(conn)
+        migrate_seconds = time.perf_counter() - start
+        after = measure(conn, "student_rows", args.rows, args.ops)
+        conn.close()
+
+    print(f"{args.rows:,} rows, migrated in {migrate_seconds:.2f}s\n")
+    print(f"{'':<22}{'version 5':>14}{'version 6':>14}{'change':>9}")
+    print(f"{'file size (KiB)':<22}{before[0] / 1024:>14,.0f}{after[0] / 1024:>14,.0f}"
+          f"{(after[0] - before[0]) / before[0]:>9.0%}")
+    print(f"{'pages':<22}{before[1]:>14,}{after[1]:>14,}")
+    for name in ("students", "student_rows", "idx_students_status_gpa", "idx_student_rows_status_gpa",
+                 "idx_students_major_gpa", "idx_student_rows_major_gpa"):
+        size = before[2].get(name) or after[2].get(name)
+        if size:
+            print(f"  {name:<32}{size / 1024:>10,.0f} KiB")
+    for op in before[3]:
+        old, new = before[3][op], after[3][op]
+        print(f"{op + ' (us)':<22}{old:>14.1f}{new:>14.1f}{(new - old) / old:>9.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+# Concurrent writers against one database file and against a sharded set:
+# each writer process adds students one transaction at a time, the way
+# enrollment-week clients hit the tracker, and the total rate is reported.
+#
+#   python3 benchmarks/bench_shards.py --writers 8 --shards 4
+
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+import success_tracker as st
+
+MAJORS = ["cs", "cis", "math", "nursing", "business", "biology", "physics", "art"]
+
+
+def writer(db_path, manifest, number, rows, start):
+    st.DB_PATH = db_path
+    st.SHARD_MANIFEST = manifest
+    start.wait()
+    for i in range(rows):
+        st.add_student(f"Writer {number}", f"w{number}.{i}@bench.com", MAJORS[i % len(MAJORS)], 3.0)
+
+
+def run(db_path, manifest, writers, rows):
+    start = multiprocessing.Event()
+    processes = [
+        multiprocessing.Process(target=writer, args=(db_path, manifest, number, rows, start))
+        for number in range(writers)
+    ]
+    for process in processes:
+        process.start()
+    began = time.perf_counter()
+    start.set()
+    for process in processes:
+        process.join()
+    elapsed = time.perf_counter() - began
+    failed = sum(process.exitcode != 0 for process in processes)
+    return writers * rows / elapsed, failed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--writers", type=int, default=8)
+    parser.add_argument("--shards", type=int, default=4)
+    parser.add_argument("--rows", type=int, default=500, help="students added by each writer")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        st.DB_PATH = os.path.join(tmp_dir, "single.db")
+        st.migrate(st.get_connection())
+        manifest = os.path.join(tmp_dir, "shards.json")
+        st.rebalance(args.shards, "email", manifest)
+        st.close_connections()
+
+        for label, path in (("single file", None), (f"{args.shards} shards", manifest)):
+            rate, failed = run(st.DB_PATH, path, args.writers, args.rows)
+            note = f"   ({failed} writers failed)" if failed else ""
+            print(f"{label:<12} {args.writers} writers  {rate:10,.0f} adds/s{note}")
+
+
+if __name__ == "__main__":
+    main()
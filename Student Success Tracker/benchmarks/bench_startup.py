@@ -0,0 +1,69 @@
+# Cold-start latency per subcommand: wall time of a fresh interpreter plus the
+# module import cost reported by `python -X importtime`.
+#
+#   python3 benchmarks/bench_startup.py
+#   python3 benchmarks/bench_startup.py --runs 20
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+TRACKER = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "success_tracker.py")
+
+COMMANDS = [
+    ("help", ["--help"]),
+    ("add", ["add", "--name", "Bench", "--email", "bench{n}@bench.com", "--major", "cs", "--gpa", "3.0"]),
+    ("update-gpa", ["update-gpa", "--id", "1", "--gpa", "3.1"]),
+    ("list", ["list", "--limit", "20"]),
+    ("list --stream (tsv)", ["list", "--limit", "20", "--stream"]),
+    ("find-major", ["find-major", "--major", "cs"]),
+    ("search", ["search", "bench"]),
+    ("stats", ["stats"]),
+    ("explain", ["explain"]),
+]
+
+
+def import_times(stderr: str):
+    # returns (total self time of every import in ms, was rich imported)
+    total_us = 0
+    rich_loaded = False
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, name = line[len("import time:"):].split("|")
+        total_us += int(self_us)
+        rich_loaded = rich_loaded or name.strip() == "rich"
+    return total_us / 1000, rich_loaded
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        env = dict(os.environ, SUCCESS_TRACKER_DB=os.path.join(tmp_dir, "bench.db"))
+        subprocess.run([sys.executable, TRACKER, "init_db"], env=env, check=True, capture_output=True)
+
+        print(f"{'command':<24} {'wall p50 ms':>12} {'imports ms':>11}  rich")
+        n = 0
+        for label, argv in COMMANDS:
+            walls, imports, rich_loaded = [], [], False
+            for _ in range(args.runs):
+                n += 1
+                cmd = [sys.executable, "-X", "importtime", TRACKER] + [a.format(n=n) for a in argv]
+                start = time.perf_counter()
+                result = subprocess.run(cmd, env=env, capture_output=True, text=True)
+                walls.append((time.perf_counter() - start) * 1000)
+                import_ms, rich_loaded = import_times(result.stderr)
+                imports.append(import_ms)
+            print(f"{label:<24} {statistics.median(walls):12.1f} {statistics.median(imports):11.1f}"
+                  f"  {'yes' if rich_loaded else 'no'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+# Scaling benchmark for the tracker: seeds synthetic databases of each size,
+# times every helper and a few CLI commands end to end, and records p50/p95
+# latency plus peak RSS to JSON. With --baseline it compares against an
+# earlier results file and exits 1 when an operation got slower.
+#
+#   python3 benchmarks/bench_suite.py --sizes 10000,100000 --output results.json
+#   python3 benchmarks/bench_suite.py --sizes 10000,100000,1000000 --baseline baseline.json
+
+import argparse
+import contextlib
+import csv
+import io
+import json
+import multiprocessing
+import os
+import platform
+import random
+import resource
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+TRACKER_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, TRACKER_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+import success_tracker as st
+from synth import MAJORS, generate_students, seed_database
+
+
+def percentiles(samples):
+    samples = sorted(samples)
+    return {
+        "p50_us": round(samples[len(samples) // 2], 1),
+        "p95_us": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 1),
+        "runs": len(samples),
+    }
+
+
+def timed(fn, args_list):
+    samples = []
+    for args in args_list:
+        start = time.perf_counter()
+        fn(*args)
+        samples.append((time.perf_counter() - start) * 1e6)
+    return percentiles(samples)
+
+
+def peak_rss_kb(who=resource.RUSAGE_SELF):
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    rss = resource.getrusage(who).ru_maxrss
+    return rss // 1024 if sys.platform == "darwin" else rss
+
+
+def bench_helpers(size: int, ops: int, rng):
+    ids = list(range(1, size + 1))
+    rng.shuffle(ids)
+    update_ids, delete_ids = ids[:ops], ids[ops:2 * ops]
+    rare_major = MAJORS[-1]
+
+    return {
+        "add": timed(st.add_student, [
+            (f"Bench {i}", f"bench{i}@uni.com", rng.choice(MAJORS), 3.0) for i in range(ops)]),
+        "list-page": timed(st.list_students, [("active", 100)] * ops),
+        "list-page-after": timed(st.list_students, [("active", 100, (3.0, size // 2))] * ops),
+        "find-major": timed(st.find_students_in_major, [(rare_major,)] * max(1, ops // 10)),
+        "update-gpa": timed(st.update_student_gpa, [(i, round(rng.uniform(0, 4), 2)) for i in update_ids]),
+        "delete": timed(st.delete_student, [(i,) for i in delete_ids]),
+        "stats": timed(st.gpa_stats, [("major",)] * max(1, ops // 10)),
+    }
+
+
+def bench_import(size: int, rows: int, runs: int, tmp_dir: str):
+    # imports runs fresh csv files of rows students each, emails continue
+    # after the seeded ones so nothing is rejected as a duplicate
+    paths = []
+    for n in range(runs):
+        path = os.path.join(tmp_dir, f"import_{size}_{n}.csv")
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(["name", "email", "major", "gpa", "status"])
+            writer.writerows(row[:5] for row in generate_students(rows, n, start=size * 2 + n * rows))
+        paths.append(path)
+    with contextlib.redirect_stdout(io.StringIO()):
+        timing = timed(st.import_students, [(path,) for path in paths])
+    timing["rows_per_s"] = round(rows / (timing["p50_us"] / 1e6))
+    return timing
+
+
+def bench_cli(db_path: str, runs: int):
+    env = dict(os.environ, SUCCESS_TRACKER_DB=db_path)
+    tracker = os.path.join(TRACKER_DIR, "success_tracker.py")
+    commands = {
+        "cli-add": ["add", "--name", "Cli", "--email", "cli{n}@uni.com", "--major", "cs", "--gpa", "3.1"],
+        "cli-list-page": ["list", "--status", "active", "--limit", "100"],
+        "cli-list-stream": ["list", "--limit", "1000", "--stream"],
+        "cli-find-major": ["find-major", "--major", MAJORS[-1], "--stream"],
+        "cli-stats": ["stats"],
+    }
+    results = {}
+    for name, argv in commands.items():
+        samples = []
+        for n in range(runs):
+            cmd = [sys.executable, tracker] + [a.format(n=n) for a in argv]
+            start = time.perf_counter()
+            subprocess.run(cmd, env=env, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            samples.append((time.perf_counter() - start) * 1e6)
+        results[name] = percentiles(samples)
+    return results
+
+
+def run_size(size: int, ops: int, cli_runs: int, tmp_dir: str):
+    st.close_connections()
+    st.DB_PATH = os.path.join(tmp_dir, f"bench_{size}.db")
+    with contextlib.redirect_stdout(io.StringIO()):
+        st.init_db()
+
+    start = time.perf_counter()
+    seed_database(st.get_connection(), size)
+    seed_seconds = time.perf_counter() - start
+
+    results = bench_helpers(size, ops, random.Random(size))
+    results["import"] = bench_import(size, ops * 20, 3, tmp_dir)
+    if cli_runs:
+        results.update(bench_cli(st.DB_PATH, cli_runs))
+    st.close_connections()
+
+    return {
+        "seed_seconds": round(seed_seconds, 2),
+        "db_bytes": os.path.getsize(st.DB_PATH),
+        "peak_rss_kb": peak_rss_kb(),
+        "cli_peak_rss_kb": peak_rss_kb(resource.RUSAGE_CHILDREN),
+        "ops": results,
+    }
+
+
+def compare(results, baseline, threshold: float):
+    regressions = []
+    for size, current in results["sizes"].items():
+        base = baseline.get("sizes", {}).get(size)
+        if not base:
+            continue
+        for op, timing in current["ops"].items():
+            base_timing = base["ops"].get(op)
+            if not base_timing:
+                continue
+            ratio = timing["p50_us"] / max(base_timing["p50_us"], 1e-9)
+            mark = "REGRESSION" if ratio > threshold else ""
+            print(f"{size:>9} {op:<18} {base_timing['p50_us']:>12.1f} {timing['p50_us']:>12.1f} {ratio:7.2f}x {mark}")
+            if ratio > threshold:
+                regressions.append((size, op, ratio))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=str, default="10000,100000,1000000")
+    parser.add_argument("--ops", type=int, default=500)
+    parser.add_argument("--cli-runs", type=int, default=5)
+    parser.add_argument("--output", type=str, default="bench_results.json")
+    parser.add_argument("--baseline", type=str)
+    parser.add_argument("--threshold", type=float, default=1.25)
+    args = parser.parse_args()
+
+    results = {
+        "meta": {
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "machine": platform.machine(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "sizes": {},
+    }
+
+    # ru_maxrss only ever rises, so each size runs in a fresh interpreter and
+    # its peak RSS is its own, not the largest size's so far
+    spawn = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for size in (int(s) for s in args.sizes.split(",")):
+            with ProcessPoolExecutor(1, mp_context=spawn) as pool:
+                result = pool.submit(run_size, size, args.ops, args.cli_runs, tmp_dir).result()
+            results["sizes"][str(size)] = result
+            print(f"--- {size} students (seeded in {result['seed_seconds']}s, "
+                  f"{result['db_bytes'] / 2 ** 20:.1f} MiB, peak RSS {result['peak_rss_kb'] / 1024:.0f} MiB)")
+            for op, timing in result["ops"].items():
+                rate = f"   {timing['rows_per_s']:,} rows/s" if "rows_per_s" in timing else ""
+                print(f"  {op:<18} p50 {timing['p50_us']:>12.1f} us   p95 {timing['p95_us']:>12.1f} us{rate}")
+
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        print(f"\n{'size':>9} {'op':<18} {'base p50 us':>12} {'p50 us':>12} {'ratio':>8}")
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} operation(s) slower than {args.threshold}x the baseline")
+            sys.exit(1)
+        print("No regressions against the baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+# Synthetic students with registrar-like skew: a few large majors and a long
+# tail, most students active, probation concentrated below a 2.0 GPA.
+#
+#   python3 benchmarks/synth.py --rows 100000 --output students.csv
+#   python3 benchmarks/synth.py --rows 100000 --output students.jsonl
+
+import argparse
+import csv
+import datetime
+import json
+import random
+import sys
+
+MAJORS = [
+    "cs", "business", "biology", "psychology", "nursing", "engineering", "cis",
+    "economics", "english", "math", "education", "history", "chemistry",
+    "physics", "art", "music", "philosophy", "geology", "linguistics", "astronomy",
+]
+# Zipf-like: the first major is about 20x the last one
+MAJOR_WEIGHTS = [1 / (rank + 1) for rank in range(len(MAJORS))]
+
+STATUSES = ["active", "probation", "graduated"]
+STATUS_WEIGHTS = [0.80, 0.12, 0.08]
+
+
+def generate_students(rows: int, seed: int = 42, start: int = 0):
+    rng = random.Random(seed)
+    majors = rng.choices(MAJORS, MAJOR_WEIGHTS, k=rows)
+    statuses = rng.choices(STATUSES, STATUS_WEIGHTS, k=rows)
+    base = datetime.datetime(2024, 9, 1)
+
+    for i in range(rows):
+        n = start + i
+        status = statuses[i]
+        if status == "probation":
+            gpa = rng.uniform(0.5, 2.2)
+        else:
+            gpa = min(4.0, max(0.0, rng.gauss(3.0, 0.5)))
+        last_updated = (base + datetime.timedelta(minutes=rng.randrange(600000)))
+        yield (
+            f"Student {n}",
+            f"student{n}@uni.com",
+            majors[i],
+            round(gpa, 2),
+            status,
+            last_updated.isoformat("T", "seconds"),
+        )
+
+
+def seed_database(conn, rows: int, seed: int = 42, batch_size: int = 10000):
+    students = generate_students(rows, seed)
+    with conn:
+        while True:
+            batch = [row for _, row in zip(range(batch_size), students)]
+            if not batch:
+                break
+            conn.executemany(
+                """INSERT INTO students(name, email, major, gpa, status, last_updated)
+                VALUES(?, ?, ?, ?, ?, ?)""", batch
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, required=True)
+    parser.add_argument("--output", type=str, default="-")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    fields = ["name", "email", "major", "gpa", "status"]
+    out = sys.stdout if args.output == "-" else open(args.output, "w", newline="", encoding="utf-8")
+    with out:
+        if args.output.endswith(".jsonl"):
+            for row in generate_students(args.rows, args.seed):
+                out.write(json.dumps(dict(zip(fields, row))) + "\n")
+        else:
+            writer = csv.writer(out)
+            writer.writerow(fields)
+            writer.writerows(row[:5] for row in generate_students(args.rows, args.seed))
+
+
+if __name__ == "__main__":
+    main()
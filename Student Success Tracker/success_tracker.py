@@ -1,26 +1,951 @@
 import sqlite3
-import rich
-from rich.console import Console
-from rich.table import Table
 import argparse
+import atexit
+import csv
 import datetime
+import gzip
+import heapq
+import io
+import itertools
+import json
+import os
 import re
+import sys
+from collections import OrderedDict, deque
+import threading
+import time
+import zlib
+
+DB_PATH = os.environ.get("SUCCESS_TRACKER_DB", "success_tracker.db")
+
+MMAP_SIZE = 256 * 1024 * 1024
+CACHE_SIZE_KB = 64 * 1024
+STATEMENT_CACHE_SIZE = 256
+
+# one connection per path and thread, the CLI only ever has one thread so it
+# opens the database once, serve's worker threads each get their own
+_local = threading.local()
+_open_connections = []
+_connections_lock = threading.Lock()
+_generation = 0
+
+def get_connection(path: str = None):
+    path = path or DB_PATH
+    # threads other than the caller of close_connections (the shard fan-out
+    # pool) drop their closed handles on the next call
+    if getattr(_local, "generation", None) != _generation:
+        _local.connections = {}
+        _local.generation = _generation
+    connections = _local.connections
+    conn = connections.get(path)
+    if conn is None:
+        start = time.perf_counter()
+        conn = sqlite3.connect(
+            path, cached_statements=STATEMENT_CACHE_SIZE, check_same_thread=False,
+            factory=ProfiledConnection if _profiler else sqlite3.Connection)
+        conn.row_factory = _profiler.make_row if _profiler else sqlite3.Row
+        # only sticks on a brand new file, before WAL writes its header,
+        # older files are switched over by compact
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA synchronous = NORMAL")
+        conn.execute(f"PRAGMA mmap_size = {MMAP_SIZE}")
+        conn.execute(f"PRAGMA cache_size = -{CACHE_SIZE_KB}")
+        conn.execute("PRAGMA temp_store = MEMORY")
+        if _profiler or _trace:
+            conn.set_trace_callback(_trace_statement)
+        if _profiler:
+            # the setup pragmas above count as connect time, not as queries
+            conn.profiled = True
+            _profiler.add("connect", time.perf_counter() - start)
+        connections[path] = conn
+        with _connections_lock:
+            _open_connections.append(conn)
+    return conn
+
+def close_connections():
+    global _generation
+    with _connections_lock:
+        while _open_connections:
+            _open_connections.pop().close()
+        _generation += 1
+
+atexit.register(close_connections)
+
+# --profile and --trace: statements run through execute() are timed by a
+# cursor subclass keyed on their SQL text, the trace callback sees everything
+# sqlite runs, including BEGIN/COMMIT and trigger bodies
+_profiler = None
+_trace = False
+
+class Profiler:
+    PHASES = ["connect", "sql", "rows", "render"]
+
+    def __init__(self):
+        self.phases = dict.fromkeys(self.PHASES, 0.0)
+        self.statements = OrderedDict()
+        self.traced = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def add(self, phase: str, seconds: float):
+        with self._lock:
+            self.phases[phase] += seconds
+
+    def record(self, sql: str, rows: int, seconds: float, calls: int = 0):
+        with self._lock:
+            entry = self.statements.get(sql)
+            if entry is None:
+                entry = self.statements[sql] = {"calls": 0, "rows": 0, "seconds": 0.0}
+            entry["calls"] += calls
+            entry["rows"] += rows
+            entry["seconds"] += seconds
+            self.phases["sql"] += seconds
+
+    def make_row(self, cursor, row):
+        start = time.perf_counter()
+        row = sqlite3.Row(cursor, row)
+        self._local.rows = getattr(self._local, "rows", 0.0) + time.perf_counter() - start
+        return row
+
+    def timed(self, sql: str, fn, *args, calls: int = 0):
+        # row conversion happens inside fetch, take it out of the query time
+        converted = getattr(self._local, "rows", 0.0)
+        start = time.perf_counter()
+        result = fn(*args)
+        elapsed = time.perf_counter() - start
+        converted = getattr(self._local, "rows", 0.0) - converted
+        if isinstance(result, list):
+            rows = len(result)
+        elif isinstance(result, sqlite3.Cursor):
+            rows = max(result.rowcount, 0)
+        else:
+            rows = result is not None
+        self.add("rows", converted)
+        self.record(sql, rows, elapsed - converted, calls)
+        return result
+
+    def timer(self, phase: str, fn):
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self.add(phase, time.perf_counter() - start)
+        return timed
+
+class ProfiledCursor(sqlite3.Cursor):
+    def execute(self, sql, params=()):
+        self._sql = " ".join(sql.split())
+        return _profiler.timed(self._sql, super().execute, sql, params, calls=1)
+
+    def executemany(self, sql, seq_of_params):
+        self._sql = " ".join(sql.split())
+        return _profiler.timed(self._sql, super().executemany, sql, seq_of_params, calls=1)
+
+    def fetchone(self):
+        return _profiler.timed(self._sql, super().fetchone)
+
+    def fetchmany(self, size=None):
+        return _profiler.timed(self._sql, super().fetchmany, size or self.arraysize)
+
+    def fetchall(self):
+        return _profiler.timed(self._sql, super().fetchall)
+
+    def __next__(self):
+        row = _profiler.timed(self._sql, super().fetchone)
+        if row is None:
+            raise StopIteration
+        return row
+
+class ProfiledConnection(sqlite3.Connection):
+    profiled = False
+
+    def execute(self, sql, params=()):
+        if not self.profiled:
+            return super().execute(sql, params)
+        return self.cursor(ProfiledCursor).execute(sql, params)
+
+    def executemany(self, sql, seq_of_params):
+        if not self.profiled:
+            return super().executemany(sql, seq_of_params)
+        return self.cursor(ProfiledCursor).executemany(sql, seq_of_params)
+
+def _trace_statement(sql: str):
+    # trigger steps come through with the text of the statement that fired
+    # them, print that once
+    if _trace and sql != getattr(_local, "last_traced", None):
+        print(f"-- {' '.join(sql.split())}", file=sys.stderr)
+        _local.last_traced = sql
+    if _profiler:
+        with _profiler._lock:
+            _profiler.traced += 1
+
+def enable_profiling(trace: bool = False):
+    global _profiler, _trace
+    _trace = trace
+    _profiler = Profiler()
+    return _profiler
+
+class QueryCache:
+    # LRU of query results for long-lived processes. PRAGMA data_version moves
+    # when another connection commits and total_changes when this one writes,
+    # so any write anywhere empties the cache before a stale row is served.
+    def __init__(self, maxsize: int = 256, ttl: float = 30.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._versions = {}
+        # bumped on every clear, a result read across a clear is not stored
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def _check_version(self, conn):
+        version = (conn.execute("PRAGMA data_version").fetchone()[0], conn.total_changes)
+        with self._lock:
+            if self._versions.get(id(conn)) != version:
+                # a connection seen for the first time cannot vouch for
+                # entries filled by the others, so it clears them too
+                self._entries.clear()
+                self._generation += 1
+                self._versions[id(conn)] = version
+
+    def fetchall(self, conn, sql: str, params=(), scope=None):
+        self._check_version(conn)
+        key = (scope, sql, tuple(params))
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return list(entry[1])
+            self.misses += 1
+            generation = self._generation
+
+        rows = conn.execute(sql, params).fetchall()
+        # another connection may have committed while this one was reading,
+        # check again so rows from before that commit are never cached
+        self._check_version(conn)
+        with self._lock:
+            if generation != self._generation:
+                return list(rows)
+            self._entries[key] = (now + self.ttl, rows)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return list(rows)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._generation += 1
+            self._versions.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+_query_cache = None
+
+def enable_query_cache(maxsize: int = 256, ttl: float = 30.0):
+    global _query_cache
+    _query_cache = QueryCache(maxsize, ttl)
+    return _query_cache
+
+def disable_query_cache():
+    global _query_cache
+    _query_cache = None
+
+def cached_fetchall(sql: str, params=(), path: str = None):
+    conn = get_connection(path)
+    if _query_cache is None:
+        return conn.execute(sql, params).fetchall()
+    return _query_cache.fetchall(conn, sql, params, scope=path)
+
+# optional sharded mode: a JSON manifest lists one database file per shard and
+# whether students are placed by email or by major. Each shard hands out ids
+# from its own block of 2**40, so ids stay unique across files and do not
+# change when a rebalance moves a student. Keying by email keeps the email
+# UNIQUE constraint global, keying by major only enforces it per shard.
+SHARD_MANIFEST = os.environ.get("SUCCESS_TRACKER_SHARDS")
+SHARD_KEYS = ("email", "major")
+SHARD_BLOCK_BITS = 40
+FAN_OUT_WORKERS = 16
+
+_manifests = {}
+_fan_out_pool = None
+_fan_out_lock = threading.Lock()
+
+def load_manifest(path: str = None):
+    path = path or SHARD_MANIFEST
+    if not path:
+        return None
+    manifest = _manifests.get(path)
+    if manifest is None:
+        with open(path, encoding="utf-8") as f:
+            manifest = json.load(f)
+        base = os.path.dirname(os.path.abspath(path))
+        manifest["paths"] = [os.path.join(base, shard["path"]) for shard in manifest["shards"]]
+        _manifests[path] = manifest
+    return manifest
+
+def shard_paths():
+    manifest = load_manifest()
+    return manifest["paths"] if manifest else [DB_PATH]
+
+def shard_index(key: str, count: int):
+    # crc32 rather than hash(), which is salted per process
+    return zlib.crc32(key.encode("utf-8")) % count
+
+def shard_slot(email: str, major: str):
+    manifest = load_manifest()
+    if not manifest:
+        return 0
+    key = email if manifest["key"] == "email" else major
+    return shard_index(key, len(manifest["paths"]))
+
+def shard_for(email: str, major: str):
+    return shard_paths()[shard_slot(email, major)]
+
+def shard_with_id(id: int):
+    manifest = load_manifest()
+    if not manifest:
+        return DB_PATH
+    # ids added since the last rebalance are in the shard that owns their
+    # block, moved ones can be anywhere, so try the owner first
+    block = id >> SHARD_BLOCK_BITS
+    paths = sorted(zip(manifest["shards"], manifest["paths"]), key=lambda s: s[0]["block"] != block)
+    for _, path in paths:
+        if get_connection(path).execute("SELECT 1 FROM student_rows WHERE id = ?", (id,)).fetchone():
+            return path
+    return None
+
+def fan_out(fn, paths=None):
+    global _fan_out_pool
+    paths = paths or shard_paths()
+    if len(paths) == 1:
+        return [fn(paths[0])]
+    with _fan_out_lock:
+        if _fan_out_pool is None:
+            from concurrent.futures import ThreadPoolExecutor
+            _fan_out_pool = ThreadPoolExecutor(FAN_OUT_WORKERS, thread_name_prefix="shard")
+    return list(_fan_out_pool.map(fn, paths))
+
+def gpa_order(row):
+    # the key of ORDER BY gpa DESC, id, where NULL gpas come last as they do
+    # in SQLite and in the keyset pages
+    return (row["gpa"] is None, -(row["gpa"] or 0), row["id"])
+
+def merge_chunks(cursors, chunk_size: int, limit: int = None, key=gpa_order):
+    if len(cursors) == 1:
+        fetch = cursors[0].fetchmany
+    else:
+        # each shard is already sorted, a k-way merge keeps the global order
+        merged = itertools.islice(heapq.merge(*cursors, key=key), limit)
+        fetch = lambda size: list(itertools.islice(merged, size))
+    while True:
+        rows = fetch(chunk_size)
+        if not rows:
+            break
+        yield rows
+
+def fetch_merged(sql: str, params, limit: int = None):
+    results = fan_out(lambda path: cached_fetchall(sql, params, path))
+    if len(results) == 1:
+        return results[0]
+    return list(itertools.islice(heapq.merge(*results, key=gpa_order), limit))
+
+# each entry moves the schema up one PRAGMA user_version, never edit an
+# entry that has shipped, append a new one instead
+MIGRATIONS = [
+    # 1: students table
+    """
+    CREATE TABLE IF NOT EXISTS students(
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            email TEXT UNIQUE NOT NULL,
+            major TEXT NOT NULL,
+            gpa REAL CHECK (gpa BETWEEN 0 AND 4),
+            status TEXT CHECK (status IN ('active','probation','graduated')) DEFAULT 'active',
+            last_updated TEXT);
+    """,
+    # 2: indexes so the status / major filters and the GPA sort read an index
+    # in order instead of scanning the table and sorting it
+    """
+    CREATE INDEX IF NOT EXISTS idx_students_status_gpa ON students(status, gpa DESC);
+    CREATE INDEX IF NOT EXISTS idx_students_major_gpa ON students(major, gpa DESC);
+    CREATE INDEX IF NOT EXISTS idx_students_gpa ON students(gpa DESC);
+    """,
+    # 3: per (major, status, half-point GPA bucket) counts and sums kept up to
+    # date by triggers, NULL GPAs count in bucket -1. The status column
+    # allowed NULL, those students take its default first
+    """
+    UPDATE students SET status = 'active' WHERE status IS NULL;
+
+    CREATE TABLE IF NOT EXISTS gpa_summary(
+            major TEXT NOT NULL,
+            status TEXT NOT NULL,
+            bucket INTEGER NOT NULL,
+            n INTEGER NOT NULL,
+            gpa_sum REAL NOT NULL,
+            PRIMARY KEY (major, status, bucket)) WITHOUT ROWID;
+
+    CREATE TRIGGER IF NOT EXISTS students_summary_insert AFTER INSERT ON students
+    BEGIN
+        INSERT INTO gpa_summary(major, status, bucket, n, gpa_sum)
+        VALUES (new.major, new.status, COALESCE(CAST(new.gpa * 2 AS INTEGER), -1), 1,
+                COALESCE(new.gpa, 0))
+        ON CONFLICT(major, status, bucket)
+        DO UPDATE SET n = n + 1, gpa_sum = gpa_sum + excluded.gpa_sum;
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS students_summary_delete AFTER DELETE ON students
+    BEGIN
+        UPDATE gpa_summary SET n = n - 1, gpa_sum = gpa_sum - COALESCE(old.gpa, 0)
+        WHERE major = old.major AND status = old.status
+            AND bucket = COALESCE(CAST(old.gpa * 2 AS INTEGER), -1);
+        DELETE FROM gpa_summary
+        WHERE major = old.major AND status = old.status
+            AND bucket = COALESCE(CAST(old.gpa * 2 AS INTEGER), -1) AND n <= 0;
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS students_summary_update
+    AFTER UPDATE OF major, status, gpa ON students
+    BEGIN
+        UPDATE gpa_summary SET n = n - 1, gpa_sum = gpa_sum - COALESCE(old.gpa, 0)
+        WHERE major = old.major AND status = old.status
+            AND bucket = COALESCE(CAST(old.gpa * 2 AS INTEGER), -1);
+        DELETE FROM gpa_summary
+        WHERE major = old.major AND status = old.status
+            AND bucket = COALESCE(CAST(old.gpa * 2 AS INTEGER), -1) AND n <= 0;
+        INSERT INTO gpa_summary(major, status, bucket, n, gpa_sum)
+        VALUES (new.major, new.status, COALESCE(CAST(new.gpa * 2 AS INTEGER), -1), 1,
+                COALESCE(new.gpa, 0))
+        ON CONFLICT(major, status, bucket)
+        DO UPDATE SET n = n + 1, gpa_sum = gpa_sum + excluded.gpa_sum;
+    END;
+
+    DELETE FROM gpa_summary;
+    INSERT INTO gpa_summary(major, status, bucket, n, gpa_sum)
+        SELECT major, status, COALESCE(CAST(gpa * 2 AS INTEGER), -1), COUNT(*),
+               COALESCE(SUM(gpa), 0)
+        FROM students GROUP BY 1, 2, 3;
+    """,
+    # 4: full-text index over name, email and major, external content so the
+    # text is not stored twice, name matches rank above email and major
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS students_fts USING fts5(
+            name, email, major, content='students', content_rowid='id', prefix='2 3');
+    INSERT INTO students_fts(students_fts, rank) VALUES ('rank', 'bm25(10.0, 5.0, 1.0)');
+
+    CREATE TRIGGER IF NOT EXISTS students_fts_insert AFTER INSERT ON students
+    BEGIN
+        INSERT INTO students_fts(rowid, name, email, major)
+        VALUES (new.id, new.name, new.email, new.major);
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS students_fts_delete AFTER DELETE ON students
+    BEGIN
+        INSERT INTO students_fts(students_fts, rowid, name, email, major)
+        VALUES ('delete', old.id, old.name, old.email, old.major);
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS students_fts_update AFTER UPDATE OF name, email, major ON students
+    BEGIN
+        INSERT INTO students_fts(students_fts, rowid, name, email, major)
+        VALUES ('delete', old.id, old.name, old.email, old.major);
+        INSERT INTO students_fts(rowid, name, email, major)
+        VALUES (new.id, new.name, new.email, new.major);
+    END;
+
+    INSERT INTO students_fts(students_fts) VALUES ('rebuild');
+    """,
+    # 5: append-only GPA / status history, one row per change, D rows mark
+    # deletes; existing students start with their current values
+    """
+    CREATE TABLE IF NOT EXISTS gpa_history(
+            id INTEGER PRIMARY KEY,
+            student_id INTEGER NOT NULL,
+            changed_at TEXT NOT NULL,
+            gpa REAL,
+            status TEXT,
+            op TEXT NOT NULL CHECK (op IN ('I','U','D')));
+    CREATE INDEX IF NOT EXISTS idx_gpa_history_student ON gpa_history(student_id, changed_at);
+
+    CREATE TRIGGER IF NOT EXISTS students_history_insert AFTER INSERT ON students
+    BEGIN
+        INSERT INTO gpa_history(student_id, changed_at, gpa, status, op)
+        VALUES (new.id, COALESCE(new.last_updated, strftime('%Y-%m-%dT%H:%M:%S', 'now', 'localtime')),
+                new.gpa, new.status, 'I');
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS students_history_update AFTER UPDATE OF gpa, status ON students
+    WHEN old.gpa IS NOT new.gpa OR old.status IS NOT new.status
+    BEGIN
+        INSERT INTO gpa_history(student_id, changed_at, gpa, status, op)
+        VALUES (new.id, COALESCE(new.last_updated, strftime('%Y-%m-%dT%H:%M:%S', 'now', 'localtime')),
+                new.gpa, new.status, 'U');
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS students_history_delete AFTER DELETE ON students
+    BEGIN
+        INSERT INTO gpa_history(student_id, changed_at, gpa, status, op)
+        VALUES (old.id, strftime('%Y-%m-%dT%H:%M:%S', 'now', 'localtime'), NULL, NULL, 'D');
+    END;
+
+    INSERT INTO gpa_history(student_id, changed_at, gpa, status, op)
+        SELECT id, COALESCE(last_updated, strftime('%Y-%m-%dT%H:%M:%S', 'now', 'localtime')),
+               gpa, status, 'I'
+        FROM students;
+    """,
+    # 6: STRICT storage with majors and statuses dictionary-encoded as
+    # integers, students becomes a view with the old columns so readers do
+    # not change; the summary, search and history triggers move to the new
+    # table and writes through the view are routed by INSTEAD OF triggers
+    """
+    CREATE TABLE IF NOT EXISTS majors(
+            id INTEGER PRIMARY KEY,
+            name TEXT UNIQUE NOT NULL) STRICT;
+
+    CREATE TABLE IF NOT EXISTS statuses(
+            code INTEGER PRIMARY KEY,
+            name TEXT UNIQUE NOT NULL) STRICT;
+    INSERT OR IGNORE INTO statuses(code, name) VALUES (0, 'active'), (1, 'probation'), (2, 'graduated');
+
+    CREATE TABLE IF NOT EXISTS student_rows(
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            email TEXT UNIQUE NOT NULL,
+            major_id INTEGER NOT NULL REFERENCES majors(id),
+            gpa REAL CHECK (gpa BETWEEN 0 AND 4),
+            status_code INTEGER NOT NULL DEFAULT 0 REFERENCES statuses(code),
+            last_updated TEXT) STRICT;
+
+    -- the old status column allowed NULL, those students become active,
+    -- the status column's default
+    INSERT OR IGNORE INTO majors(name) SELECT DISTINCT major FROM students ORDER BY major;
+    INSERT INTO student_rows(id, name, email, major_id, gpa, status_code, last_updated)
+        SELECT s.id, s.name, s.email, m.id, s.gpa, COALESCE(st.code, 0), s.last_updated
+        FROM students s
+        JOIN majors m ON m.name = s.major
+        LEFT JOIN statuses st ON st.name = s.status;
+
+    -- keep ids of deleted students retired, gpa_history still refers to them
+    INSERT INTO sqlite_sequence(name, seq)
+        SELECT 'student_rows', 0
+        WHERE NOT EXISTS (SELECT 1 FROM sqlite_sequence WHERE name = 'student_rows');
+    UPDATE sqlite_sequence
+        SET seq = MAX(seq, COALESCE((SELECT seq FROM sqlite_sequence WHERE name = 'students'), 0))
+        WHERE name = 'student_rows';
+
+    DROP TABLE students;
+
+    CREATE VIEW students AS
+        SELECT r.id, r.name, r.email, m.name AS major, r.gpa, st.name AS status, r.last_updated
+        FROM student_rows r
+        JOIN majors m ON m.id = r.major_id
+        JOIN statuses st ON st.code = r.status_code;
+
+    CREATE INDEX IF NOT EXISTS idx_student_rows_status_gpa ON student_rows(status_code, gpa DESC);
+    CREATE INDEX IF NOT EXISTS idx_student_rows_major_gpa ON student_rows(major_id, gpa DESC);
+    CREATE INDEX IF NOT EXISTS idx_student_rows_gpa ON student_rows(gpa DESC);
+
+    CREATE TRIGGER IF NOT EXISTS students_view_insert INSTEAD OF INSERT ON students
+    BEGIN
+        INSERT OR IGNORE INTO majors(name) VALUES (new.major);
+        INSERT INTO student_rows(id, name, email, major_id, gpa, status_code, last_updated)
+        VALUES (new.id, new.name, new.email,
+                (SELECT id FROM majors WHERE name = new.major), new.gpa,
+                (SELECT code FROM statuses WHERE name = COALESCE(new.status, 'active')),
+                new.last_updated);
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS students_view_update INSTEAD OF UPDATE ON students
+    BEGIN
+        INSERT OR IGNORE INTO majors(name) VALUES (new.major);
+        UPDATE student_rows SET
+            name = new.name, email = new.email,
+            major_id = (SELECT id FROM majors WHERE name = new.major), gpa = new.gpa,
+            status_code = (SELECT code FROM statuses WHERE name = new.status),
+            last_updated = new.last_updated
+        WHERE id = old.id;
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS students_view_delete INSTEAD OF DELETE ON students
+    BEGIN
+        DELETE FROM student_rows WHERE id = old.id;
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS student_rows_summary_insert AFTER INSERT ON student_rows
+    BEGIN
+        INSERT INTO gpa_summary(major, status, bucket, n, gpa_sum)
+        VALUES ((SELECT name FROM majors WHERE id = new.major_id),
+                (SELECT name FROM statuses WHERE code = new.status_code),
+                COALESCE(CAST(new.gpa * 2 AS INTEGER), -1), 1, COALESCE(new.gpa, 0))
+        ON CONFLICT(major, status, bucket)
+        DO UPDATE SET n = n + 1, gpa_sum = gpa_sum + excluded.gpa_sum;
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS student_rows_summary_delete AFTER DELETE ON student_rows
+    BEGIN
+        UPDATE gpa_summary SET n = n - 1, gpa_sum = gpa_sum - COALESCE(old.gpa, 0)
+        WHERE major = (SELECT name FROM majors WHERE id = old.major_id)
+            AND status = (SELECT name FROM statuses WHERE code = old.status_code)
+            AND bucket = COALESCE(CAST(old.gpa * 2 AS INTEGER), -1);
+        DELETE FROM gpa_summary WHERE n <= 0
+            AND major = (SELECT name FROM majors WHERE id = old.major_id)
+            AND status = (SELECT name FROM statuses WHERE code = old.status_code)
+            AND bucket = COALESCE(CAST(old.gpa * 2 AS INTEGER), -1);
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS student_rows_summary_update
+    AFTER UPDATE OF major_id, status_code, gpa ON student_rows
+    BEGIN
+        UPDATE gpa_summary SET n = n - 1, gpa_sum = gpa_sum - COALESCE(old.gpa, 0)
+        WHERE major = (SELECT name FROM majors WHERE id = old.major_id)
+            AND status = (SELECT name FROM statuses WHERE code = old.status_code)
+            AND bucket = COALESCE(CAST(old.gpa * 2 AS INTEGER), -1);
+        DELETE FROM gpa_summary WHERE n <= 0
+            AND major = (SELECT name FROM majors WHERE id = old.major_id)
+            AND status = (SELECT name FROM statuses WHERE code = old.status_code)
+            AND bucket = COALESCE(CAST(old.gpa * 2 AS INTEGER), -1);
+        INSERT INTO gpa_summary(major, status, bucket, n, gpa_sum)
+        VALUES ((SELECT name FROM majors WHERE id = new.major_id),
+                (SELECT name FROM statuses WHERE code = new.status_code),
+                COALESCE(CAST(new.gpa * 2 AS INTEGER), -1), 1, COALESCE(new.gpa, 0))
+        ON CONFLICT(major, status, bucket)
+        DO UPDATE SET n = n + 1, gpa_sum = gpa_sum + excluded.gpa_sum;
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS student_rows_fts_insert AFTER INSERT ON student_rows
+    BEGIN
+        INSERT INTO students_fts(rowid, name, email, major)
+        VALUES (new.id, new.name, new.email, (SELECT name FROM majors WHERE id = new.major_id));
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS student_rows_fts_delete AFTER DELETE ON student_rows
+    BEGIN
+        INSERT INTO students_fts(students_fts, rowid, name, email, major)
+        VALUES ('delete', old.id, old.name, old.email, (SELECT name FROM majors WHERE id = old.major_id));
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS student_rows_fts_update
+    AFTER UPDATE OF name, email, major_id ON student_rows
+    BEGIN
+        INSERT INTO students_fts(students_fts, rowid, name, email, major)
+        VALUES ('delete', old.id, old.name, old.email, (SELECT name FROM majors WHERE id = old.major_id));
+        INSERT INTO students_fts(rowid, name, email, major)
+        VALUES (new.id, new.name, new.email, (SELECT name FROM majors WHERE id = new.major_id));
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS student_rows_history_insert AFTER INSERT ON student_rows
+    BEGIN
+        INSERT INTO gpa_history(student_id, changed_at, gpa, status, op)
+        VALUES (new.id, COALESCE(new.last_updated, strftime('%Y-%m-%dT%H:%M:%S', 'now', 'localtime')),
+                new.gpa, (SELECT name FROM statuses WHERE code = new.status_code), 'I');
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS student_rows_history_update
+    AFTER UPDATE OF gpa, status_code ON student_rows
+    WHEN old.gpa IS NOT new.gpa OR old.status_code IS NOT new.status_code
+    BEGIN
+        INSERT INTO gpa_history(student_id, changed_at, gpa, status, op)
+        VALUES (new.id, COALESCE(new.last_updated, strftime('%Y-%m-%dT%H:%M:%S', 'now', 'localtime')),
+                new.gpa, (SELECT name FROM statuses WHERE code = new.status_code), 'U');
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS student_rows_history_delete AFTER DELETE ON student_rows
+    BEGIN
+        INSERT INTO gpa_history(student_id, changed_at, gpa, status, op)
+        VALUES (old.id, strftime('%Y-%m-%dT%H:%M:%S', 'now', 'localtime'), NULL, NULL, 'D');
+    END;
+    """,
+    # 7: per-major GPA ranks snapshot, rebuilt on read only for the majors
+    # whose students changed since the last build
+    """
+    CREATE TABLE IF NOT EXISTS student_ranks(
+            student_id INTEGER PRIMARY KEY,
+            major_id INTEGER NOT NULL,
+            gpa REAL NOT NULL,
+            position INTEGER NOT NULL,
+            major_rank INTEGER NOT NULL,
+            below INTEGER NOT NULL,
+            major_size INTEGER NOT NULL) STRICT;
+    CREATE INDEX IF NOT EXISTS idx_student_ranks_major ON student_ranks(major_id, position);
+
+    CREATE TABLE IF NOT EXISTS rank_dirty(major_id INTEGER PRIMARY KEY) STRICT;
+    INSERT OR IGNORE INTO rank_dirty(major_id) SELECT id FROM majors;
+
+    CREATE TRIGGER IF NOT EXISTS student_rows_rank_insert AFTER INSERT ON student_rows
+    BEGIN
+        INSERT OR IGNORE INTO rank_dirty(major_id) VALUES (new.major_id);
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS student_rows_rank_delete AFTER DELETE ON student_rows
+    BEGIN
+        INSERT OR IGNORE INTO rank_dirty(major_id) VALUES (old.major_id);
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS student_rows_rank_update AFTER UPDATE OF gpa, major_id ON student_rows
+    WHEN old.gpa IS NOT new.gpa OR old.major_id != new.major_id
+    BEGIN
+        INSERT OR IGNORE INTO rank_dirty(major_id) VALUES (old.major_id), (new.major_id);
+    END;
+    """,
+    # 8: history rows carry the major in effect, and D rows the name and
+    # email, so as-of can list students that were deleted or archived later
+    """
+    ALTER TABLE gpa_history ADD COLUMN major TEXT;
+    ALTER TABLE gpa_history ADD COLUMN name TEXT;
+    ALTER TABLE gpa_history ADD COLUMN email TEXT;
+
+    DROP TRIGGER IF EXISTS student_rows_history_insert;
+    DROP TRIGGER IF EXISTS student_rows_history_update;
+    DROP TRIGGER IF EXISTS student_rows_history_delete;
+
+    CREATE TRIGGER student_rows_history_insert AFTER INSERT ON student_rows
+    BEGIN
+        INSERT INTO gpa_history(student_id, changed_at, gpa, status, op, major)
+        VALUES (new.id, COALESCE(new.last_updated, strftime('%Y-%m-%dT%H:%M:%S', 'now', 'localtime')),
+                new.gpa, (SELECT name FROM statuses WHERE code = new.status_code), 'I',
+                (SELECT name FROM majors WHERE id = new.major_id));
+    END;
+
+    CREATE TRIGGER student_rows_history_update
+    AFTER UPDATE OF gpa, status_code, major_id ON student_rows
+    WHEN old.gpa IS NOT new.gpa OR old.status_code IS NOT new.status_code OR old.major_id != new.major_id
+    BEGIN
+        INSERT INTO gpa_history(student_id, changed_at, gpa, status, op, major)
+        VALUES (new.id, COALESCE(new.last_updated, strftime('%Y-%m-%dT%H:%M:%S', 'now', 'localtime')),
+                new.gpa, (SELECT name FROM statuses WHERE code = new.status_code), 'U',
+                (SELECT name FROM majors WHERE id = new.major_id));
+    END;
+
+    CREATE TRIGGER student_rows_history_delete AFTER DELETE ON student_rows
+    BEGIN
+        INSERT INTO gpa_history(student_id, changed_at, gpa, status, op, major, name, email)
+        VALUES (old.id, strftime('%Y-%m-%dT%H:%M:%S', 'now', 'localtime'), NULL, NULL, 'D',
+                (SELECT name FROM majors WHERE id = old.major_id), old.name, old.email);
+    END;
+    """,
+    # 9: a row in bulk_load switches the per-row insert triggers off, import
+    # sets it inside its own transaction and maintains the summary, search
+    # index, history and rank queue once per batch instead (BULK_MAINTENANCE)
+    """
+    CREATE TABLE IF NOT EXISTS bulk_load(active INTEGER PRIMARY KEY) STRICT;
+
+    DROP TRIGGER IF EXISTS student_rows_summary_insert;
+    DROP TRIGGER IF EXISTS student_rows_fts_insert;
+    DROP TRIGGER IF EXISTS student_rows_history_insert;
+    DROP TRIGGER IF EXISTS student_rows_rank_insert;
+
+    CREATE TRIGGER student_rows_summary_insert AFTER INSERT ON student_rows
+    WHEN NOT EXISTS (SELECT 1 FROM bulk_load)
+    BEGIN
+        INSERT INTO gpa_summary(major, status, bucket, n, gpa_sum)
+        VALUES ((SELECT name FROM majors WHERE id = new.major_id),
+                (SELECT name FROM statuses WHERE code = new.status_code),
+                COALESCE(CAST(new.gpa * 2 AS INTEGER), -1), 1, COALESCE(new.gpa, 0))
+        ON CONFLICT(major, status, bucket)
+        DO UPDATE SET n = n + 1, gpa_sum = gpa_sum + excluded.gpa_sum;
+    END;
+
+    CREATE TRIGGER student_rows_fts_insert AFTER INSERT ON student_rows
+    WHEN NOT EXISTS (SELECT 1 FROM bulk_load)
+    BEGIN
+        INSERT INTO students_fts(rowid, name, email, major)
+        VALUES (new.id, new.name, new.email, (SELECT name FROM majors WHERE id = new.major_id));
+    END;
+
+    CREATE TRIGGER student_rows_history_insert AFTER INSERT ON student_rows
+    WHEN NOT EXISTS (SELECT 1 FROM bulk_load)
+    BEGIN
+        INSERT INTO gpa_history(student_id, changed_at, gpa, status, op, major)
+        VALUES (new.id, COALESCE(new.last_updated, strftime('%Y-%m-%dT%H:%M:%S', 'now', 'localtime')),
+                new.gpa, (SELECT name FROM statuses WHERE code = new.status_code), 'I',
+                (SELECT name FROM majors WHERE id = new.major_id));
+    END;
+
+    CREATE TRIGGER student_rows_rank_insert AFTER INSERT ON student_rows
+    WHEN NOT EXISTS (SELECT 1 FROM bulk_load)
+    BEGIN
+        INSERT OR IGNORE INTO rank_dirty(major_id) VALUES (new.major_id);
+    END;
+    """,
+    # 10: A rows mark archived students, the archive relabels its D rows and
+    # fills in the gpa and status they left with. History rows from before
+    # version 8 get the current major so as-of can filter on it, and as-of
+    # walks the history in (gpa, id) order through the last two indexes.
+    # SQLite cannot change a CHECK in place, so the table is copied and the
+    # triggers writing to it are created again
+    """
+    DROP TRIGGER student_rows_history_insert;
+    DROP TRIGGER student_rows_history_update;
+    DROP TRIGGER student_rows_history_delete;
+
+    CREATE TABLE gpa_history_v10(
+            id INTEGER PRIMARY KEY,
+            student_id INTEGER NOT NULL,
+            changed_at TEXT NOT NULL,
+            gpa REAL,
+            status TEXT,
+            op TEXT NOT NULL CHECK (op IN ('I','U','D','A')),
+            major TEXT,
+            name TEXT,
+            email TEXT);
+    INSERT INTO gpa_history_v10 SELECT id, student_id, changed_at, gpa, status, op, major, name, email
+        FROM gpa_history;
+    DROP TABLE gpa_history;
+    ALTER TABLE gpa_history_v10 RENAME TO gpa_history;
+
+    UPDATE gpa_history SET major = (
+        SELECT m.name FROM student_rows s JOIN majors m ON m.id = s.major_id
+        WHERE s.id = gpa_history.student_id)
+    WHERE major IS NULL;
+
+    CREATE INDEX idx_gpa_history_student ON gpa_history(student_id, changed_at);
+    CREATE INDEX idx_gpa_history_as_of ON gpa_history(COALESCE(gpa, -1) DESC, student_id)
+        WHERE op != 'D';
+    CREATE INDEX idx_gpa_history_as_of_major ON gpa_history(major, COALESCE(gpa, -1) DESC, student_id)
+        WHERE op != 'D';
+
+    CREATE TRIGGER student_rows_history_insert AFTER INSERT ON student_rows
+    WHEN NOT EXISTS (SELECT 1 FROM bulk_load)
+    BEGIN
+        INSERT INTO gpa_history(student_id, changed_at, gpa, status, op, major)
+        VALUES (new.id, COALESCE(new.last_updated, strftime('%Y-%m-%dT%H:%M:%S', 'now', 'localtime')),
+                new.gpa, (SELECT name FROM statuses WHERE code = new.status_code), 'I',
+                (SELECT name FROM majors WHERE id = new.major_id));
+    END;
+
+    CREATE TRIGGER student_rows_history_update
+    AFTER UPDATE OF gpa, status_code, major_id ON student_rows
+    WHEN old.gpa IS NOT new.gpa OR old.status_code IS NOT new.status_code OR old.major_id != new.major_id
+    BEGIN
+        INSERT INTO gpa_history(student_id, changed_at, gpa, status, op, major)
+        VALUES (new.id, COALESCE(new.last_updated, strftime('%Y-%m-%dT%H:%M:%S', 'now', 'localtime')),
+                new.gpa, (SELECT name FROM statuses WHERE code = new.status_code), 'U',
+                (SELECT name FROM majors WHERE id = new.major_id));
+    END;
+
+    CREATE TRIGGER student_rows_history_delete AFTER DELETE ON student_rows
+    BEGIN
+        INSERT INTO gpa_history(student_id, changed_at, gpa, status, op, major, name, email)
+        VALUES (old.id, strftime('%Y-%m-%dT%H:%M:%S', 'now', 'localtime'), NULL, NULL, 'D',
+                (SELECT name FROM majors WHERE id = old.major_id), old.name, old.email);
+    END;
+    """,
+    # 11: top without a major reads every major's first n positions, a range
+    # of this index instead of a walk through idx_student_ranks_major
+    """
+    CREATE INDEX IF NOT EXISTS idx_student_ranks_position ON student_ranks(position, major_id);
+    """,
+]
+
+# walks the history rows in (gpa, id) order, keeping a row when one probe of
+# (student_id, changed_at) up to the given time lands on it, so students
+# deleted or archived since still show. Students whose row then is a D are
+# gone, A rows are students that were archived and still count. Name and
+# email come from the live row or else the last D or A row
+AS_OF = """SELECT h.student_id AS id,
+            COALESCE(s.name, d.name) AS name, COALESCE(s.email, d.email) AS email,
+            h.major, h.gpa, h.status, h.changed_at AS last_updated
+        FROM gpa_history h
+        LEFT JOIN student_rows s ON s.id = h.student_id
+        LEFT JOIN gpa_history d ON s.id IS NULL AND d.id = (
+            SELECT id FROM gpa_history WHERE student_id = h.student_id AND op IN ('D', 'A')
+            ORDER BY changed_at DESC, id DESC LIMIT 1)
+        WHERE {major} h.op != 'D' AND COALESCE(h.gpa, -1) >= -1
+            AND h.id = (SELECT id FROM gpa_history WHERE student_id = h.student_id AND changed_at <= ?
+                        ORDER BY changed_at DESC, id DESC LIMIT 1)
+        ORDER BY COALESCE(h.gpa, -1) DESC, h.student_id"""
+
+# keyset pages continue after the (gpa, id) of the last row shown. NULL gpas
+# sort last, so the rest of the page comes from two index ranges that SQLite
+# merges in order: lower gpas, then the NULLs, which after a NULL cursor only
+# need a higher id. The filters are repeated in both halves and are bound
+# twice (students_query), LIMIT -1 means no limit
+PAGE_AFTER = """SELECT * FROM students WHERE {where}gpa <= ? AND (gpa < ? OR id > ?)
+        UNION ALL
+        SELECT * FROM students WHERE {where}gpa IS NULL AND (? IS NOT NULL OR id > ?)
+        ORDER BY gpa DESC, id LIMIT ?"""
+
+QUERIES = {
+    "list": "SELECT * FROM students ORDER BY gpa DESC, id LIMIT ?",
+    "list-after": PAGE_AFTER.format(where=""),
+    "list-status": "SELECT * FROM students WHERE status = ? ORDER BY gpa DESC, id LIMIT ?",
+    "list-status-after": PAGE_AFTER.format(where="status = ? AND "),
+    "find-major": "SELECT * FROM students WHERE major = ? ORDER BY gpa DESC, id LIMIT ?",
+    "find-major-after": PAGE_AFTER.format(where="major = ? AND "),
+    "find-major-status": """SELECT * FROM students
+        WHERE major = ? AND status = ? ORDER BY gpa DESC, id LIMIT ?""",
+    "find-major-status-after": PAGE_AFTER.format(where="major = ? AND status = ? AND "),
+    "search": """SELECT s.*, rank FROM students_fts JOIN students s ON s.id = students_fts.rowid
+        WHERE students_fts MATCH ? ORDER BY rank LIMIT ?""",
+    "stats-min-major": "SELECT MIN(gpa) FROM students WHERE major = ?",
+    "stats-max-major": "SELECT MAX(gpa) FROM students WHERE major = ?",
+    "stats-min-status": "SELECT MIN(gpa) FROM students WHERE status = ?",
+    "stats-max-status": "SELECT MAX(gpa) FROM students WHERE status = ?",
+    "history": "SELECT * FROM gpa_history WHERE student_id = ? ORDER BY changed_at, id",
+    # top_students sorts by major itself, so no ORDER BY
+    "top": """SELECT r.major_rank AS rank, s.*, r.major_size FROM student_ranks r
+        JOIN students s ON s.id = r.student_id
+        WHERE r.position <= ?""",
+    "top-major": """SELECT r.major_rank AS rank, s.*, r.major_size FROM student_ranks r
+        JOIN students s ON s.id = r.student_id
+        WHERE r.major_id = (SELECT id FROM majors WHERE name = ?) AND r.position <= ?
+        ORDER BY r.position""",
+    "rank": """SELECT r.major_rank AS rank, r.below, r.major_size, s.* FROM student_ranks r
+        JOIN students s ON s.id = r.student_id WHERE r.student_id = ?""",
+    "rank-count": """SELECT COALESCE(SUM(gpa > ?), 0), COALESCE(SUM(gpa < ?), 0), COUNT(*)
+        FROM student_ranks WHERE major_id = (SELECT id FROM majors WHERE name = ?)""",
+    "as-of": AS_OF.format(major=""),
+    "as-of-major": AS_OF.format(major="h.major = ? AND"),
+}
+
+def schema_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+def migrate(conn, target: int = None):
+    if target is None:
+        target = len(MIGRATIONS)
+    version = schema_version(conn)
+    for number in range(version + 1, target + 1):
+        conn.executescript(
+            f"BEGIN; {MIGRATIONS[number - 1]} PRAGMA user_version = {number}; COMMIT;"
+        )
+    return version, max(version, target)
 
 def init_db():
-    with sqlite3.connect("success_tracker.db") as conn:
-        conn.execute(""" 
-            CREATE TABLE IF NOT EXISTS students(
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    name TEXT NOT NULL,
-                    email TEXT UNIQUE NOT NULL,
-                    major TEXT NOT NULL,
-                    gpa REAL CHECK (gpa BETWEEN 0 AND 4),
-                    status TEXT CHECK (status IN ('active','probation','graduated')) DEFAULT 'active',
-                    last_updated TEXT)
-        """)
-        print("---Students Table Created---")
+    old_version, new_version = fan_out(lambda path: migrate(get_connection(path)))[0]
+    print("---Students Table Created---")
+    if new_version != old_version:
+        print(f"Schema migrated from version {old_version} to {new_version}")
 
-def add_student(name: str, email:str, major:str, gpa:float, status:str = "active"):
+def explain_queries():
+    conn = get_connection(shard_paths()[0])
+    plans = {}
+    for name, sql in QUERIES.items():
+        params = (None,) * sql.count("?")
+        rows = conn.execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()
+        plans[name] = (sql, [row["detail"] for row in rows])
+    return plans
+
+def is_full_scan(detail: str, sql: str = ""):
+    # SEARCH is a seek into an index, SCAN reads from one end, through an
+    # index or not. That is only bounded when the rows come in index order
+    # and a LIMIT stops the read. FTS MATCH shows up as a virtual table SCAN
+    if detail.startswith("USE TEMP B-TREE"):
+        return True
+    if not detail.startswith("SCAN") or "VIRTUAL TABLE" in detail:
+        return False
+    return "INDEX" not in detail or not sql.rstrip().endswith("LIMIT ?")
+
+EMAIL_PATTERN = re.compile(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+.com")
+
+def validate_student(name: str, email:str, major:str, gpa:float, status:str = "active"):
     valid_status = ['active','probation','graduated']
     if not ( 0<= gpa <=4 ):
         raise ValueError("GPA is out of range")
@@ -28,98 +953,1346 @@ def add_student(name: str, email:str, major:str, gpa:float, status:str = "active
     if status not in valid_status:
         raise ValueError("Invalid status")
     
-    email_pattern = r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+.com"
-    if not re.match(email_pattern, email):
+    if not EMAIL_PATTERN.match(email):
         raise ValueError("Invalid email format")
 
+# writes go to the base table, lastrowid and rowcount are not reported for
+# statements routed through the view's INSTEAD OF triggers
+INSERT_MAJOR = "INSERT OR IGNORE INTO majors(name) VALUES (?)"
+INSERT_STUDENT = """
+    INSERT {conflict} INTO student_rows(name, email, major_id, gpa, status_code, last_updated)
+    VALUES(?, ?, (SELECT id FROM majors WHERE name = ?), ?,
+           (SELECT code FROM statuses WHERE name = ?), ?)
+"""
+
+def add_student(name: str, email:str, major:str, gpa:float, status:str = "active"):
+    validate_student(name, email, major, gpa, status)
     
     last_updated = datetime.datetime.now().isoformat("T", "seconds")
 
-    with sqlite3.connect("success_tracker.db") as conn:
+    conn = get_connection(shard_for(email, major))
+    with conn:
+        conn.execute(INSERT_MAJOR, (major,))
         cursor = conn.execute(
-            """INSERT INTO students(name, email, major, gpa, status, last_updated)
-            VALUES(?, ?, ?, ?, ?, ?)""", (name, email, major, gpa, status, last_updated)
+            INSERT_STUDENT.format(conflict=""), (name, email, major, gpa, status, last_updated)
         )
         return cursor.lastrowid
 
-def list_students(status:str = None):
-    valid_status = ['active','probation','graduated']
-    
-    
-    with sqlite3.connect("success_tracker.db") as conn:
-        conn.row_factory = sqlite3.Row
-        if status:
-            if status not in valid_status:
-                raise ValueError("Invalid status")
-            
-            cursor = conn.execute(
-                "SELECT * FROM students WHERE status = ? ORDER BY gpa DESC", (status,)
-            )
+IMPORT_FIELDS = ["name", "email", "major", "gpa", "status"]
+
+def import_format(path: str, fmt: str = None):
+    if fmt is None:
+        fmt = "jsonl" if path.endswith((".jsonl", ".json")) else "csv"
+    if fmt not in ("csv", "jsonl"):
+        raise ValueError("Invalid import format")
+    return fmt
+
+def parse_jsonl_line(line: str):
+    try:
+        return json.loads(line)
+    except json.JSONDecodeError:
+        return {"_raw": line.rstrip("\n")}
+
+def read_import_rows(path: str, fmt: str = None):
+    fmt = import_format(path, fmt)
+
+    # utf-8-sig drops the byte order mark spreadsheet exports start with,
+    # _chunk_ranges skips it the same way
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        if fmt == "csv":
+            for line_no, row in enumerate(csv.DictReader(f), start=2):
+                yield line_no, row
         else:
-            cursor = conn.execute(
-                "SELECT * FROM students ORDER BY gpa DESC"
-            )
-        return cursor.fetchall()
-    
-def find_students_in_major(major:str):
-    with sqlite3.connect("success_tracker.db") as conn:
-        conn.row_factory = sqlite3.Row
-        cursor = conn.execute(
-            "SELECT * FROM students WHERE major = ?",(major,)
+            for line_no, line in enumerate(f, start=1):
+                if line.strip():
+                    yield line_no, parse_jsonl_line(line)
+
+def parse_import_row(row):
+    if not isinstance(row, dict) or "_raw" in row:
+        raise ValueError("Malformed row")
+
+    missing = [field for field in IMPORT_FIELDS[:4] if not row.get(field)]
+    if missing:
+        raise ValueError(f"Missing fields: {', '.join(missing)}")
+
+    try:
+        gpa = float(row["gpa"])
+    except (TypeError, ValueError):
+        raise ValueError("GPA is not a number")
+
+    name, email, major = str(row["name"]), str(row["email"]), str(row["major"])
+    status = row.get("status") or "active"
+    validate_student(name, email, major, gpa, status)
+    return name, email, major, gpa, status
+
+def validate_import_rows(rows):
+    # yields (line, values, None) for good rows and (line, row, error) for bad
+    for line_no, row in rows:
+        try:
+            yield line_no, parse_import_row(row), None
+        except ValueError as e:
+            yield line_no, row, str(e)
+
+def _chunk_ranges(path: str, fmt: str, chunk_bytes: int):
+    # byte ranges that always end on a line break, one record per line is
+    # assumed so CSV fields must not contain quoted newlines
+    fieldnames = None
+    ranges = []
+    size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        if f.read(3) != b"\xef\xbb\xbf":
+            f.seek(0)
+        if fmt == "csv":
+            fieldnames = next(csv.reader([f.readline().decode("utf-8")]), None)
+        start = f.tell()
+        while start < size:
+            f.seek(min(start + chunk_bytes, size))
+            f.readline()
+            end = f.tell()
+            ranges.append((start, end))
+            start = end
+    return fieldnames, ranges
+
+def _validate_chunk(path: str, fmt: str, fieldnames, start: int, end: int):
+    with open(path, "rb") as f:
+        f.seek(start)
+        text = f.read(end - start).decode("utf-8")
+
+    if fmt == "csv":
+        reader = csv.DictReader(io.StringIO(text, newline=""), fieldnames=fieldnames)
+        rows = ((reader.line_num, row) for row in reader)
+    else:
+        rows = ((line_no, parse_jsonl_line(line))
+                for line_no, line in enumerate(text.split("\n"), start=1) if line.strip())
+    return list(validate_import_rows(rows)), text.count("\n")
+
+def validate_import_parallel(path: str, fmt: str = None, workers: int = None,
+                             chunk_bytes: int = 4 * 1024 * 1024):
+    from concurrent.futures import ProcessPoolExecutor
+
+    fmt = import_format(path, fmt)
+    workers = workers or os.cpu_count()
+    fieldnames, ranges = _chunk_ranges(path, fmt, chunk_bytes)
+    ranges = iter(ranges)
+    # the header is line 1, chunk line numbers are relative to their start
+    base = 1 if fmt == "csv" else 0
+
+    with ProcessPoolExecutor(workers) as pool:
+        # keep a couple of chunks per worker in flight so the writer never
+        # waits, but never hold the whole file's results in memory
+        pending = deque(
+            pool.submit(_validate_chunk, path, fmt, fieldnames, start, end)
+            for start, end in [r for _, r in zip(range(workers * 2), ranges)]
+        )
+        while pending:
+            results, line_count = pending.popleft().result()
+            next_range = next(ranges, None)
+            if next_range:
+                pending.append(pool.submit(_validate_chunk, path, fmt, fieldnames, *next_range))
+            for line_no, value, error in results:
+                yield base + line_no, value, error
+            base += line_count
+
+# what the per-row insert triggers do, for every row past a given id at once.
+# New ids are always above the old maximum, so those are exactly the batch
+BULK_MAINTENANCE = [
+    """INSERT INTO gpa_summary(major, status, bucket, n, gpa_sum)
+    SELECT m.name, st.name, COALESCE(CAST(r.gpa * 2 AS INTEGER), -1), COUNT(*), SUM(COALESCE(r.gpa, 0))
+    FROM student_rows r JOIN majors m ON m.id = r.major_id JOIN statuses st ON st.code = r.status_code
+    WHERE r.id > ? GROUP BY 1, 2, 3
+    ON CONFLICT(major, status, bucket)
+    DO UPDATE SET n = n + excluded.n, gpa_sum = gpa_sum + excluded.gpa_sum""",
+    """INSERT INTO students_fts(rowid, name, email, major)
+    SELECT r.id, r.name, r.email, m.name FROM student_rows r JOIN majors m ON m.id = r.major_id
+    WHERE r.id > ?""",
+    """INSERT INTO gpa_history(student_id, changed_at, gpa, status, op, major)
+    SELECT r.id, COALESCE(r.last_updated, strftime('%Y-%m-%dT%H:%M:%S', 'now', 'localtime')),
+           r.gpa, st.name, 'I', m.name
+    FROM student_rows r JOIN majors m ON m.id = r.major_id JOIN statuses st ON st.code = r.status_code
+    WHERE r.id > ? ORDER BY r.id""",
+    "INSERT OR IGNORE INTO rank_dirty(major_id) SELECT DISTINCT major_id FROM student_rows WHERE id > ?",
+]
+
+def _insert_batch(conn, batch, reject):
+    conn.executemany(INSERT_MAJOR, {(values[2],) for _, values in batch})
+    last_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM student_rows").fetchone()[0]
+    # the bulk_load row never leaves this transaction, other connections
+    # keep their per-row triggers
+    conn.execute("INSERT INTO bulk_load(active) VALUES (1)")
+    try:
+        cursor = conn.executemany(
+            INSERT_STUDENT.format(conflict="OR IGNORE"), [values for _, values in batch]
         )
-        return cursor.fetchall()
+        for sql in BULK_MAINTENANCE:
+            conn.execute(sql, (last_id,))
+    finally:
+        conn.execute("DELETE FROM bulk_load")
+    if cursor.rowcount == len(batch):
+        return len(batch)
+
+    # rows were validated already, so the ignored ones are duplicate emails,
+    # the rows that did go in are exactly the ones past the old max id
+    inserted = {row[0] for row in conn.execute("SELECT email FROM student_rows WHERE id > ?", (last_id,))}
+    for line_no, values in batch:
+        if values[1] in inserted:
+            inserted.discard(values[1])
+        else:
+            reject(line_no, dict(zip(IMPORT_FIELDS, values)), "UNIQUE constraint failed: students.email")
+    return cursor.rowcount
+
+def import_students(path: str, fmt: str = None, rejects_path: str = None,
+                    batch_size: int = 5000, commit_every: int = 100000, workers: int = 1):
+    start = time.perf_counter()
+    last_updated = datetime.datetime.now().isoformat("T", "seconds")
+    imported = rejected = 0
+
+    rejects_file = rejects_writer = None
+    if rejects_path:
+        rejects_file = open(rejects_path, "w", newline="", encoding="utf-8")
+        rejects_writer = csv.writer(rejects_file)
+        rejects_writer.writerow(["line", *IMPORT_FIELDS, "error"])
+
+    def reject(line_no, row, error):
+        nonlocal rejected
+        rejected += 1
+        if rejects_writer:
+            if not isinstance(row, dict):
+                row = {}
+            rejects_writer.writerow(
+                [line_no, *(row.get(field, "") for field in IMPORT_FIELDS), error])
+
+    # validation fans out to worker processes, this process stays the only
+    # writer so SQLite never sees lock contention
+    if workers == 1:
+        rows = validate_import_rows(read_import_rows(path, fmt))
+    else:
+        rows = validate_import_parallel(path, fmt, workers)
+
+    conns = [get_connection(path) for path in shard_paths()]
+    try:
+        for conn in conns:
+            conn.execute("BEGIN")
+        batches = [[] for _ in conns]
+        pending = 0
+        for line_no, values, error in rows:
+            if error:
+                reject(line_no, values, error)
+                continue
+
+            slot = shard_slot(values[1], values[2])
+            batch = batches[slot]
+            batch.append((line_no, (*values, last_updated)))
+            if len(batch) >= batch_size:
+                imported += _insert_batch(conns[slot], batch, reject)
+                pending += len(batch)
+                batches[slot] = []
+                if pending >= commit_every:
+                    for conn in conns:
+                        conn.commit()
+                        conn.execute("BEGIN")
+                    pending = 0
+
+        for conn, batch in zip(conns, batches):
+            if batch:
+                imported += _insert_batch(conn, batch, reject)
+        for conn in conns:
+            conn.commit()
+    except BaseException:
+        for conn in conns:
+            conn.rollback()
+        raise
+    finally:
+        if rejects_file:
+            rejects_file.close()
+
+    return imported, rejected, time.perf_counter() - start
+
+def students_query(status:str = None, major:str = None, after=None, limit:int = None):
+    valid_status = ['active','probation','graduated']
+    if status and status not in valid_status:
+        raise ValueError("Invalid status")
+
+    if major and status:
+        name, params = "find-major-status", [major, status]
+    elif major:
+        name, params = "find-major", [major]
+    elif status:
+        name, params = "list-status", [status]
+    else:
+        name, params = "list", []
+
+    if after is not None:
+        gpa, last_id = after
+        name += "-after"
+        params = [*params, gpa, gpa, last_id, *params, gpa, last_id]
+
+    params.append(-1 if limit is None else limit)
+    return QUERIES[name], params
+
+def iter_students(status:str = None, major:str = None, after=None, limit:int = None,
+                  chunk_size:int = 1000, include_archived: bool = False):
+    sql, params = students_query(status, major, after, limit)
+    sources = []
+    for path in shard_paths():
+        conn = get_connection(path)
+        if include_archived and status in (None, "graduated") and attach_archive(conn, path):
+            sources.append(iter_archived(conn, major, after, limit))
+        sources.append(conn.execute(sql, params))
+    yield from merge_chunks(sources, chunk_size, limit)
+
+def list_students(status:str = None, limit:int = None, after=None):
+    sql, params = students_query(status, after=after, limit=limit)
+    return fetch_merged(sql, params, limit)
+    
+def find_students_in_major(major:str, limit:int = None, after=None):
+    sql, params = students_query(major=major, after=after, limit=limit)
+    return fetch_merged(sql, params, limit)
         
+SEARCH_FIELDS = ["name", "email", "major"]
+
+def search_expression(text: str, field: str = None):
+    # every word becomes a quoted prefix term, so "ali gma" finds ali@gmail.com
+    terms = re.findall(r"\w+", text)
+    if not terms:
+        raise ValueError("Search text must contain at least one word")
+    expression = " ".join(f'"{term}"*' for term in terms)
+    if field:
+        if field not in SEARCH_FIELDS:
+            raise ValueError("Invalid search field")
+        expression = f"{field} : ({expression})"
+    return expression
+
+def search_students(text: str, field: str = None, limit:int = 50, chunk_size:int = 1000):
+    expression = search_expression(text, field)
+    params = (expression, -1 if limit is None else limit)
+    cursors = [get_connection(path).execute(QUERIES["search"], params) for path in shard_paths()]
+    # bm25 is scored against each shard's own statistics, close enough to
+    # interleave the shards by it
+    yield from merge_chunks(cursors, chunk_size, limit, key=lambda row: row["rank"])
+
+def parse_timestamp(value: str):
+    try:
+        return datetime.datetime.fromisoformat(value).isoformat("T", "seconds")
+    except ValueError:
+        raise ValueError("Timestamp must be ISO format, e.g. 2025-12-21T16:25:00")
+
+def student_history(id: int):
+    changes = fan_out(lambda path: get_connection(path).execute(QUERIES["history"], (id,)).fetchall())
+    return sorted(itertools.chain(*changes), key=lambda change: change["changed_at"])
+
+def iter_students_as_of(at: str, status: str = None, major: str = None, chunk_size: int = 1000):
+    valid_status = ['active','probation','graduated']
+    if status and status not in valid_status:
+        raise ValueError("Invalid status")
+
+    at = parse_timestamp(at)
+    if major:
+        sql, params = QUERIES["as-of-major"], (major, at)
+    else:
+        sql, params = QUERIES["as-of"], (at,)
+    cursors = [get_connection(path).execute(sql, params) for path in shard_paths()]
+    for rows in merge_chunks(cursors, chunk_size):
+        # status is the one in effect at that time, so filter after the lookup
+        if status:
+            rows = [s for s in rows if s["status"] == status]
+        if rows:
+            yield rows
+
+EXPORT_FIELDS = ["id", "name", "email", "major", "gpa", "status", "last_updated"]
+
+def open_export(path: str, compress: bool = False):
+    compress = compress or path.endswith(".gz")
+    if path == "-":
+        if compress:
+            return io.TextIOWrapper(
+                gzip.GzipFile(fileobj=sys.stdout.buffer, mode="wb"), encoding="utf-8", newline="")
+        return open(sys.stdout.fileno(), "w", encoding="utf-8", newline="", closefd=False)
+    if compress:
+        return gzip.open(path, "wt", encoding="utf-8", newline="")
+    return open(path, "w", encoding="utf-8", newline="")
+
+def export_students(out, fmt: str = "csv", status:str = None, major:str = None,
+                    chunk_size:int = 5000):
+    if fmt not in ("csv", "jsonl"):
+        raise ValueError("Invalid export format")
+    sql, params = students_query(status, major)
+
+    conns = [get_connection(path) for path in shard_paths()]
+    count = 0
+    # one read transaction, so the dump comes from a single WAL snapshot even
+    # while update-gpa commits from other processes (one per shard when sharded)
+    for conn in conns:
+        conn.execute("BEGIN")
+    try:
+        cursors = [conn.execute(sql, params) for conn in conns]
+        if fmt == "csv":
+            writer = csv.writer(out)
+            writer.writerow(EXPORT_FIELDS)
+        for rows in merge_chunks(cursors, chunk_size):
+            if fmt == "csv":
+                writer.writerows(rows)
+            else:
+                out.write("".join(json.dumps(dict(row)) + "\n" for row in rows))
+            count += len(rows)
+    finally:
+        for conn in conns:
+            conn.rollback()
+    return count
+
+SUMMARY_REBUILD = """
+    INSERT INTO gpa_summary(major, status, bucket, n, gpa_sum)
+    SELECT major, status, COALESCE(CAST(gpa * 2 AS INTEGER), -1), COUNT(*),
+           COALESCE(SUM(gpa), 0)
+    FROM students GROUP BY 1, 2, 3
+"""
+
+def _shard_stats(path: str, by: str):
+    conn = get_connection(path)
+    stats = {}
+    rows = conn.execute(
+        f"SELECT {by} AS key, bucket, SUM(n), SUM(gpa_sum) FROM gpa_summary "
+        f"GROUP BY {by}, bucket ORDER BY {by}"
+    )
+    for key, bucket, n, gpa_sum in rows:
+        entry = stats.setdefault(key, {"count": 0, "graded": 0, "gpa_sum": 0.0, "histogram": {}})
+        entry["count"] += n
+        if bucket >= 0:
+            entry["graded"] += n
+            entry["gpa_sum"] += gpa_sum
+            entry["histogram"][bucket / 2] = n
+
+    # min/max are two index probes per group instead of a summary column that
+    # deletes would have to rebuild
+    for key, entry in stats.items():
+        entry["min"] = conn.execute(QUERIES[f"stats-min-{by}"], (key,)).fetchone()[0]
+        entry["max"] = conn.execute(QUERIES[f"stats-max-{by}"], (key,)).fetchone()[0]
+    return stats
+
+def gpa_stats(by: str = "major"):
+    if by not in ("major", "status"):
+        raise ValueError("Stats can only be grouped by major or status")
+
+    stats = {}
+    for shard in fan_out(lambda path: _shard_stats(path, by)):
+        for key, part in shard.items():
+            entry = stats.get(key)
+            if entry is None:
+                stats[key] = part
+                continue
+            entry["count"] += part["count"]
+            entry["graded"] += part["graded"]
+            entry["gpa_sum"] += part["gpa_sum"]
+            for bucket, n in part["histogram"].items():
+                entry["histogram"][bucket] = entry["histogram"].get(bucket, 0) + n
+            graded = [gpa for gpa in (entry["min"], part["min"]) if gpa is not None]
+            entry["min"] = min(graded, default=None)
+            graded = [gpa for gpa in (entry["max"], part["max"]) if gpa is not None]
+            entry["max"] = max(graded, default=None)
+
+    for entry in stats.values():
+        entry["mean"] = entry["gpa_sum"] / entry["graded"] if entry["graded"] else None
+    return dict(sorted(stats.items()))
+
+def recompute_stats():
+    groups = mismatched = 0
+    for shard_groups, shard_mismatched in fan_out(_recompute_shard_stats):
+        groups += shard_groups
+        mismatched += shard_mismatched
+    return groups, mismatched
+
+def _recompute_shard_stats(path: str):
+    conn = get_connection(path)
+    select = "SELECT major, status, bucket, n, gpa_sum FROM gpa_summary"
+    with conn:
+        before = {row[:3]: row[3:] for row in conn.execute(select)}
+        conn.execute("DELETE FROM gpa_summary")
+        conn.execute(SUMMARY_REBUILD)
+        after = {row[:3]: row[3:] for row in conn.execute(select)}
+
+    # groups whose maintained count or sum did not match the source rows
+    mismatched = 0
+    for key in before.keys() | after.keys():
+        old, new = before.get(key, (0, 0.0)), after.get(key, (0, 0.0))
+        if old[0] != new[0] or abs(old[1] - new[1]) > 1e-6:
+            mismatched += 1
+    return len(after), mismatched
+
 def update_student_gpa(id: int, gpa:float):
     if not ( 0<= gpa <=4 ):
         raise ValueError("GPA is out of range")
     
     last_updated = datetime.datetime.now().isoformat("T", "seconds")
     
-    with sqlite3.connect("success_tracker.db") as conn:
+    path = shard_with_id(id)
+    if path is None:
+        return 0
+    conn = get_connection(path)
+    with conn:
         cursor = conn.execute(
-            "UPDATE students SET gpa = ?, last_updated = ? WHERE id = ?", (gpa, last_updated, id)
+            "UPDATE student_rows SET gpa = ?, last_updated = ? WHERE id = ?", (gpa, last_updated, id)
         )
         return cursor.rowcount
     
+def read_gpa_updates(path: str, fmt: str = None):
+    updates = []
+    for line_no, row in read_import_rows(path, fmt):
+        try:
+            id, gpa = int(row["id"]), float(row["gpa"])
+        except (KeyError, TypeError, ValueError):
+            raise ValueError(f"Line {line_no}: expected numeric id and gpa")
+        if not ( 0<= gpa <=4 ):
+            raise ValueError(f"Line {line_no}: GPA is out of range")
+        updates.append((id, gpa))
+    return updates
+
+def update_student_gpas(updates):
+    last_updated = datetime.datetime.now().isoformat("T", "seconds")
+    params = []
+    for id, gpa in updates:
+        if not ( 0<= gpa <=4 ):
+            raise ValueError("GPA is out of range")
+        params.append((gpa, last_updated, id))
+
+    # ids not on a shard update nothing there, so every shard takes the whole
+    # list in its own transaction
+    def update_shard(path):
+        conn = get_connection(path)
+        with conn:
+            return conn.executemany(
+                "UPDATE student_rows SET gpa = ?, last_updated = ? WHERE id = ?", params
+            ).rowcount
+    return sum(fan_out(update_shard))
+
+def update_status_where(new_status: str, below: float = None, at_least: float = None,
+                        from_status: str = None, major: str = None):
+    valid_status = ['active','probation','graduated']
+    if new_status not in valid_status or (from_status and from_status not in valid_status):
+        raise ValueError("Invalid status")
+
+    status_code = "(SELECT code FROM statuses WHERE name = ?)"
+    clauses, params = [f"status_code != {status_code}"], [new_status]
+    if below is not None:
+        clauses.append("gpa < ?")
+        params.append(below)
+    if at_least is not None:
+        clauses.append("gpa >= ?")
+        params.append(at_least)
+    if from_status:
+        clauses.append(f"status_code = {status_code}")
+        params.append(from_status)
+    if major:
+        clauses.append("major_id = (SELECT id FROM majors WHERE name = ?)")
+        params.append(major)
+    if len(clauses) == 1:
+        raise ValueError("Give at least one of --below, --at-least, --from-status or --major")
+
+    last_updated = datetime.datetime.now().isoformat("T", "seconds")
+    def update_shard(path):
+        conn = get_connection(path)
+        with conn:
+            return conn.execute(
+                f"UPDATE student_rows SET status_code = {status_code}, last_updated = ? "
+                f"WHERE {' AND '.join(clauses)}",
+                [new_status, last_updated, *params]
+            ).rowcount
+
+    manifest = load_manifest()
+    paths = [shard_for(None, major)] if major and manifest and manifest["key"] == "major" else None
+    return sum(fan_out(update_shard, paths))
+
 def delete_student(id:int):
-    with sqlite3.connect("success_tracker.db") as conn:
+    path = shard_with_id(id)
+    if path is None:
+        return 0
+    conn = get_connection(path)
+    with conn:
         cursor = conn.execute(
-            "DELETE FROM students WHERE id = ?", (id,)
+            "DELETE FROM student_rows WHERE id = ?", (id,)
         )
         return cursor.rowcount
     
-parser = argparse.ArgumentParser()
-subparser = parser.add_subparsers(dest="command")
+# graduated students past a cutoff move to a cold database next to each hot
+# file, attached as "archive". Only what list needs to order and filter is
+# kept in columns, the rest of the row is a compressed JSON payload
+ARCHIVE_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS archive.archived_students(
+            id INTEGER PRIMARY KEY,
+            major TEXT NOT NULL,
+            gpa REAL,
+            archived_at TEXT NOT NULL,
+            format INTEGER NOT NULL,
+            payload BLOB NOT NULL) STRICT;
+    CREATE INDEX IF NOT EXISTS archive.idx_archived_gpa ON archived_students(gpa DESC, id);
+    CREATE INDEX IF NOT EXISTS archive.idx_archived_major_gpa ON archived_students(major, gpa DESC, id);
+"""
+
+# payloads are zlib streams primed with this dictionary, which takes one
+# student's JSON from ~135 bytes to ~85. Never edit it, existing payloads
+# need it to decompress, bump ARCHIVE_FORMAT with a new one instead
+ARCHIVE_FORMAT = 1
+ARCHIVE_ZDICT = (b'{"id":,"name":"","email":"@gmail.com@uni.com","major":"","gpa":,'
+                 b'"status":"graduated","last_updated":"20')
+
+def archive_path(path: str):
+    return os.path.splitext(path)[0] + ".archive.db"
+
+def attach_archive(conn, path: str, create: bool = False):
+    if any(row[1] == "archive" for row in conn.execute("PRAGMA database_list")):
+        return True
+    target = archive_path(path)
+    if not create and not os.path.exists(target):
+        return False
+    conn.execute("ATTACH DATABASE ? AS archive", (target,))
+    conn.executescript(ARCHIVE_SCHEMA)
+    return True
+
+def pack_student(student: dict):
+    packer = zlib.compressobj(9, zdict=ARCHIVE_ZDICT)
+    return packer.compress(json.dumps(student, separators=(",", ":")).encode("utf-8")) + packer.flush()
+
+def unpack_student(payload: bytes):
+    unpacker = zlib.decompressobj(zdict=ARCHIVE_ZDICT)
+    return json.loads(unpacker.decompress(payload) + unpacker.flush())
+
+def iter_archived(conn, major: str = None, after=None, limit: int = None):
+    where, params = ("major = ? AND ", [major]) if major else ("", [])
+    limit = -1 if limit is None else limit
+    if after is None:
+        sql = f"""SELECT payload, gpa, id FROM archive.archived_students
+            {'WHERE major = ?' if major else ''} ORDER BY gpa DESC, id LIMIT ?"""
+        params = [*params, limit]
+    else:
+        # the same two ranges as PAGE_AFTER
+        gpa, last_id = after
+        sql = f"""SELECT payload, gpa, id FROM archive.archived_students
+            WHERE {where}gpa <= ? AND (gpa < ? OR id > ?)
+            UNION ALL
+            SELECT payload, gpa, id FROM archive.archived_students
+            WHERE {where}gpa IS NULL AND (? IS NOT NULL OR id > ?)
+            ORDER BY gpa DESC, id LIMIT ?"""
+        params = [*params, gpa, gpa, last_id, *params, gpa, last_id, limit]
+    for payload, _, _ in conn.execute(sql, params):
+        yield unpack_student(payload)
+
+def _archive_shard(path: str, cutoff: str, archived_at: str, chunk_size: int):
+    conn = get_connection(path)
+    attach_archive(conn, path, create=True)
+
+    # copy and commit first, then delete. The databases commit separately, so
+    # a crash in between leaves a student in both stores, never in neither
+    with conn:
+        cursor = conn.execute(
+            "SELECT * FROM students WHERE status = 'graduated' AND last_updated < ?", (cutoff,))
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            conn.executemany(
+                """INSERT OR REPLACE INTO archive.archived_students(id, major, gpa, archived_at, format, payload)
+                VALUES(?, ?, ?, ?, ?, ?)""",
+                [(s["id"], s["major"], s["gpa"], archived_at, ARCHIVE_FORMAT, pack_student(dict(s)))
+                 for s in rows])
+
+    with conn:
+        last_change = conn.execute("SELECT COALESCE(MAX(id), 0) FROM gpa_history").fetchone()[0]
+        moved = conn.execute(
+            """DELETE FROM student_rows
+            WHERE status_code = (SELECT code FROM statuses WHERE name = 'graduated')
+                AND last_updated < ?
+                AND EXISTS (SELECT 1 FROM archive.archived_students a
+                            WHERE a.id = student_rows.id AND a.archived_at = ?)""",
+            (cutoff, archived_at)).rowcount
+        # the delete trigger logged these as D, they are archived, not gone
+        conn.execute(
+            """UPDATE gpa_history SET op = 'A', status = 'graduated',
+                gpa = (SELECT gpa FROM archive.archived_students a WHERE a.id = gpa_history.student_id)
+            WHERE id > ? AND op = 'D'""", (last_change,))
+
+    # copies of students that were updated in the meantime, or left over from
+    # an interrupted run, are dropped so nobody is listed twice
+    with conn:
+        conn.execute(
+            """DELETE FROM archive.archived_students
+            WHERE EXISTS (SELECT 1 FROM main.student_rows r WHERE r.id = archived_students.id)""")
+    return moved
+
+def archive_students(before: str, chunk_size: int = 5000):
+    cutoff = parse_timestamp(before)
+    archived_at = datetime.datetime.now().isoformat("T", "seconds")
+    moved = sum(_archive_shard(path, cutoff, archived_at, chunk_size) for path in shard_paths())
+    return moved, [archive_path(path) for path in shard_paths()]
+
+RANK_REBUILD = """
+    INSERT INTO student_ranks(student_id, major_id, gpa, position, major_rank, below, major_size)
+    SELECT id, major_id, gpa,
+           ROW_NUMBER() OVER (PARTITION BY major_id ORDER BY gpa DESC, id),
+           RANK() OVER (PARTITION BY major_id ORDER BY gpa DESC),
+           RANK() OVER (PARTITION BY major_id ORDER BY gpa) - 1,
+           COUNT(*) OVER (PARTITION BY major_id)
+    FROM student_rows
+    WHERE gpa IS NOT NULL AND major_id IN (SELECT major_id FROM rank_dirty)
+"""
+
+def _refresh_shard_ranks(path: str):
+    conn = get_connection(path)
+    # the usual case is nothing changed, which needs no write lock
+    if conn.execute("SELECT 1 FROM rank_dirty LIMIT 1").fetchone() is None:
+        return 0
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        majors = conn.execute("SELECT COUNT(*) FROM rank_dirty").fetchone()[0]
+        conn.execute("DELETE FROM student_ranks WHERE major_id IN (SELECT major_id FROM rank_dirty)")
+        conn.execute(RANK_REBUILD)
+        conn.execute("DELETE FROM rank_dirty")
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    return majors
+
+def refresh_ranks():
+    return sum(fan_out(_refresh_shard_ranks))
+
+def top_students(n: int = 10, major: str = None):
+    if n < 1:
+        raise ValueError("N must be at least 1")
+    refresh_ranks()
+    if major:
+        sql, params = QUERIES["top-major"], (major, n)
+    else:
+        sql, params = QUERIES["top"], (n,)
+    shards = fan_out(lambda path: get_connection(path).execute(sql, params).fetchall())
+    if len(shards) == 1:
+        return sorted(shards[0], key=lambda s: (s["major"], -s["gpa"], s["id"]))
+
+    # every shard ranked only its own students. Anyone in the overall top n
+    # is in their shard's top n, and so is everyone above them, so ranking
+    # the union again gives the exact overall ranks
+    sizes = {}
+    for rows in shards:
+        for major_name, size in {(s["major"], s["major_size"]) for s in rows}:
+            sizes[major_name] = sizes.get(major_name, 0) + size
+    merged = sorted((dict(s) for rows in shards for s in rows),
+                    key=lambda s: (s["major"], -s["gpa"], s["id"]))
+    ranked = []
+    for major_name, group in itertools.groupby(merged, key=lambda s: s["major"]):
+        previous = None
+        for position, student in enumerate(itertools.islice(group, n), 1):
+            if student["gpa"] != previous:
+                rank, previous = position, student["gpa"]
+            student.update(rank=rank, major_size=sizes[major_name])
+            ranked.append(student)
+    return ranked
+
+def student_rank(id: int):
+    refresh_ranks()
+    path = shard_with_id(id)
+    row = path and get_connection(path).execute(QUERIES["rank"], (id,)).fetchone()
+    if not row:
+        return None
+    student = dict(row)
+    if len(shard_paths()) > 1:
+        params = (row["gpa"], row["gpa"], row["major"])
+        counts = fan_out(lambda path: get_connection(path).execute(QUERIES["rank-count"], params).fetchone())
+        student["rank"] = 1 + sum(higher for higher, _, _ in counts)
+        student["below"] = sum(below for _, below, _ in counts)
+        student["major_size"] = sum(size for _, _, size in counts)
+    # share of the major with a lower GPA, the top student is at 100
+    size = student["major_size"]
+    student["percentile"] = 100 * student["below"] / (size - 1) if size > 1 else 100.0
+    return student
 
-start_db = subparser.add_parser("init_db")
+COPY_STUDENT = """
+    INSERT INTO student_rows(id, name, email, major_id, gpa, status_code, last_updated)
+    VALUES(?, ?, ?, (SELECT id FROM majors WHERE name = ?), ?,
+           (SELECT code FROM statuses WHERE name = ?), ?)
+"""
+
+def _copy_rows(conn, students, history):
+    if students:
+        conn.executemany(INSERT_MAJOR, {(row[3],) for row in students})
+        conn.executemany(COPY_STUDENT, students)
+    if history:
+        conn.executemany(
+            """INSERT INTO gpa_history(student_id, changed_at, gpa, status, op, major, name, email)
+            VALUES(?, ?, ?, ?, ?, ?, ?, ?)""",
+            history)
+
+def rebalance(count: int, key: str = None, manifest_path: str = None, chunk_size: int = 5000):
+    if count < 1:
+        raise ValueError("Shard count must be at least 1")
+    manifest_path = manifest_path or SHARD_MANIFEST or "success_tracker.shards.json"
+    old = load_manifest(manifest_path) if os.path.exists(manifest_path) else None
+    key = key or (old["key"] if old else "email")
+    if key not in SHARD_KEYS:
+        raise ValueError("Shards can only be keyed by email or major")
+    # a running daemon keeps its connections to the old files and would go
+    # on writing to them after the new manifest is in place
+    if is_serving():
+        raise ValueError(f"A tracker is serving on {SOCKET_PATH}, stop it before rebalancing")
+
+    # a single database hands out ids from block 0, so new shards start at 1
+    sources = old["paths"] if old else [DB_PATH]
+    next_block = old["next_block"] if old else 1
+    base = os.path.dirname(os.path.abspath(manifest_path))
+    stem = os.path.splitext(os.path.basename(manifest_path))[0]
+    shards = [{"path": f"{stem}.{block}.db", "block": block}
+              for block in range(next_block, next_block + count)]
+    targets = [os.path.join(base, shard["path"]) for shard in shards]
+    for target in targets:
+        if os.path.exists(target):
+            raise ValueError(f"{target} already exists")
+
+    archived = [source for source in sources if os.path.exists(archive_path(source))]
+    target_conns = [get_connection(target) for target in targets]
+    for conn, target, shard in zip(target_conns, targets, shards):
+        migrate(conn)
+        conn.execute(
+            "UPDATE sqlite_sequence SET seq = ? WHERE name = 'student_rows'",
+            (shard["block"] << SHARD_BLOCK_BITS,))
+        conn.commit()
+        if archived:
+            attach_archive(conn, target, create=True)
+        conn.execute("BEGIN")
+
+    # the sources stay write-locked until the new manifest is in place, so no
+    # write can land in a shard that is about to be dropped
+    source_conns = [get_connection(source) for source in sources]
+    moved = 0
+    try:
+        for source, conn in zip(sources, source_conns):
+            # the history copy below reads the latest columns
+            migrate(conn)
+            if source in archived:
+                attach_archive(conn, source)
+            conn.execute("BEGIN IMMEDIATE")
+
+        placed = {}
+        for conn in source_conns:
+            cursor = conn.execute(
+                "SELECT id, name, email, major, gpa, status, last_updated FROM students ORDER BY id")
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                batches = [[] for _ in targets]
+                for row in rows:
+                    slot = shard_index(row["email"] if key == "email" else row["major"], count)
+                    placed[row["id"]] = slot
+                    batches[slot].append(tuple(row))
+                for target, batch in zip(target_conns, batches):
+                    _copy_rows(target, batch, None)
+                moved += len(rows)
+
+        # the copies logged fresh 'I' rows, replace them with the real history;
+        # rows of deleted students go to the first shard
+        for target in target_conns:
+            target.execute("DELETE FROM gpa_history")
+        for conn in source_conns:
+            cursor = conn.execute(
+                "SELECT student_id, changed_at, gpa, status, op, major, name, email FROM gpa_history ORDER BY id")
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                batches = [[] for _ in targets]
+                for row in rows:
+                    batches[placed.get(row[0], 0)].append(tuple(row))
+                for target, batch in zip(target_conns, batches):
+                    _copy_rows(target, None, batch)
+
+        for source, conn in zip(sources, source_conns):
+            if source not in archived:
+                continue
+            cursor = conn.execute(
+                "SELECT id, major, gpa, archived_at, format, payload FROM archive.archived_students")
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                batches = [[] for _ in targets]
+                for row in rows:
+                    value = row["major"] if key == "major" else unpack_student(row["payload"])["email"]
+                    batches[shard_index(value, count)].append(tuple(row))
+                for target, batch in zip(target_conns, batches):
+                    target.executemany(
+                        """INSERT INTO archive.archived_students(id, major, gpa, archived_at, format, payload)
+                        VALUES(?, ?, ?, ?, ?, ?)""", batch)
 
-add = subparser.add_parser("add")
-add.add_argument("--name", required=True, type=str)
-add.add_argument("--email", required=True, type=str)
-add.add_argument("--major", required=True, type=str)
-add.add_argument("--gpa", required=True, type=float)
-add.add_argument("--status", type=str, default="active")
+        for target in target_conns:
+            target.commit()
+        manifest = {"key": key, "next_block": next_block + count, "shards": shards}
+        with open(manifest_path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(manifest_path + ".tmp", manifest_path)
+    except BaseException:
+        # release the sources before closing everything, or the original
+        # error would be lost behind one about a closed database
+        for conn in target_conns + source_conns:
+            if conn.in_transaction:
+                conn.rollback()
+        close_connections()
+        for target in targets:
+            for suffix in ("", "-wal", "-shm"):
+                for path in (target, archive_path(target)):
+                    if os.path.exists(path + suffix):
+                        os.remove(path + suffix)
+        raise
 
-view_students = subparser.add_parser("list")
-view_students.add_argument("--status", type=str)
+    for conn in source_conns:
+        conn.rollback()
+    close_connections()
+    _manifests.clear()
+    # the single database is left alone, old shard files are replaced
+    if old:
+        for source in sources:
+            for suffix in ("", "-wal", "-shm"):
+                for path in (source, archive_path(source)):
+                    if os.path.exists(path + suffix):
+                        os.remove(path + suffix)
+    return moved, targets
+
+def _backup_file(path: str, target: str, pages: int, progress, pause: float):
+    # copy into a temporary name so a half-done backup never looks complete
+    partial = target + ".partial"
+    if os.path.exists(partial):
+        os.remove(partial)
+
+    def step(status, remaining, total):
+        if progress:
+            progress(path, total - remaining, total)
+        if pause:
+            time.sleep(pause)
+
+    copy = sqlite3.connect(partial)
+    try:
+        # each step holds a read snapshot for only `pages` pages, writers keep
+        # committing in between and the copy restarts if it saw a change
+        get_connection(path).backup(copy, pages=pages, progress=step)
+        total = copy.execute("PRAGMA page_count").fetchone()[0]
+    finally:
+        copy.close()
+    os.replace(partial, target)
+    return total
+
+def backup_database(dest: str, pages: int = 256, progress=None, pause: float = 0.0):
+    if pages < 1:
+        raise ValueError("Backup step must be at least one page")
+    manifest = load_manifest()
+    if manifest:
+        # a sharded set goes into a directory next to a copy of its manifest
+        files = [(path, os.path.join(dest, shard["path"]))
+                 for shard, path in zip(manifest["shards"], manifest["paths"])]
+    else:
+        files = [(DB_PATH, dest)]
+    # connecting would create an empty database and back that up
+    for path, _ in files:
+        if not os.path.exists(path):
+            raise ValueError(f"{path} does not exist, nothing to back up")
+    for _, target in files:
+        if os.path.dirname(target):
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+
+    copied = []
+    for path, target in files:
+        copied.append((path, target, _backup_file(path, target, pages, progress, pause)))
+        if os.path.exists(archive_path(path)):
+            copied.append((archive_path(path), archive_path(target),
+                           _backup_file(archive_path(path), archive_path(target), pages, progress, pause)))
+    if not manifest:
+        return copied
+    with open(os.path.join(dest, os.path.basename(SHARD_MANIFEST)), "w", encoding="utf-8") as f:
+        json.dump({k: v for k, v in manifest.items() if k != "paths"}, f, indent=2)
+    return copied
+
+def _compact_file(path: str, pages: int = None):
+    conn = get_connection(path)
+    version = schema_version(conn)
+    if version < len(MIGRATIONS):
+        raise ValueError(f"{path}: schema is at version {version} of {len(MIGRATIONS)}, run init_db first")
+    page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+    before = conn.execute("PRAGMA page_count").fetchone()[0]
+    free = conn.execute("PRAGMA freelist_count").fetchone()[0]
+
+    # deletes leave the full-text index as many small segments, merge them
+    # first so the pages they free are reclaimed below
+    with conn:
+        conn.execute("INSERT INTO students_fts(students_fts) VALUES ('optimize')")
+
+    rebuilt = conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2
+    if rebuilt:
+        # auto_vacuum can only be switched by rebuilding the file once
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        conn.execute("VACUUM")
+    else:
+        # the pragma frees one page per step and execute() only steps once,
+        # executescript runs it to the end
+        conn.executescript(f"PRAGMA incremental_vacuum({pages or 0});")
+    conn.execute("PRAGMA optimize")
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    after = conn.execute("PRAGMA page_count").fetchone()[0]
+    return {"path": path, "before": before * page_size, "after": after * page_size,
+            "free_pages": free, "rebuilt": rebuilt}
+
+def compact_database(pages: int = None):
+    return [_compact_file(path, pages) for path in shard_paths()]
+
+SOCKET_PATH = os.environ.get("SUCCESS_TRACKER_SOCKET", "success_tracker.sock")
+
+SERVICE_OPS = {
+    "ping": lambda a: "pong",
+    "cache-stats": lambda a: (
+        {"hits": _query_cache.hits, "misses": _query_cache.misses, "entries": len(_query_cache)}
+        if _query_cache else None),
+    "add": lambda a: add_student(a["name"], a["email"], a["major"], a["gpa"], a.get("status", "active")),
+    "list": lambda a: [dict(s) for s in list_students(a.get("status"), a.get("limit"), a.get("after"))],
+    "find-major": lambda a: [dict(s) for s in find_students_in_major(a["major"], a.get("limit"), a.get("after"))],
+    "update-gpa": lambda a: update_student_gpa(a["id"], a["gpa"]),
+    "delete": lambda a: delete_student(a["id"]),
+    "top": lambda a: [dict(s) for s in top_students(a.get("n", 10), a.get("major"))],
+    "rank": lambda a: student_rank(a["id"]),
+}
+
+def is_serving(socket_path: str = None):
+    # a socket file nobody accepts on is left over from a crashed daemon
+    import socket
+
+    socket_path = socket_path or SOCKET_PATH
+    if not os.path.exists(socket_path):
+        return False
+    probe = socket.socket(socket.AF_UNIX)
+    try:
+        probe.connect(socket_path)
+        return True
+    except (ConnectionRefusedError, FileNotFoundError):
+        return False
+    finally:
+        probe.close()
+
+def handle_request(request):
+    if not isinstance(request, dict) or request.get("op") not in SERVICE_OPS:
+        return {"ok": False, "error": "Unknown op"}
+    args = request.get("args") or {}
+    if not isinstance(args, dict):
+        return {"ok": False, "error": "args must be an object"}
+    try:
+        return {"ok": True, "result": SERVICE_OPS[request["op"]](args)}
+    except KeyError as e:
+        return {"ok": False, "error": f"Missing argument {e}"}
+    except (ValueError, TypeError, sqlite3.Error) as e:
+        return {"ok": False, "error": str(e)}
+    except Exception as e:
+        # a bad request must never take the connection down with it
+        return {"ok": False, "error": f"{type(e).__name__}: {e}"}
+
+def serve(socket_path: str = None, workers: int = 4):
+    # one JSON request per line in, one JSON response per line out, the event
+    # loop multiplexes clients and the pool threads run the queries
+    import asyncio
+    import signal
+    from concurrent.futures import ThreadPoolExecutor
+
+    socket_path = socket_path or SOCKET_PATH
+    if is_serving(socket_path):
+        raise RuntimeError(f"A tracker is already serving on {socket_path}")
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+
+    pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="tracker")
+    # open every worker's connection now so the first requests find them warm
+    for future in [pool.submit(get_connection) for _ in range(workers)]:
+        future.result()
+
+    async def client(reader, writer):
+        loop = asyncio.get_running_loop()
+        try:
+            while line := await reader.readline():
+                try:
+                    request = json.loads(line)
+                except json.JSONDecodeError:
+                    response = {"ok": False, "error": "Request is not valid JSON"}
+                else:
+                    response = await loop.run_in_executor(pool, handle_request, request)
+                writer.write(json.dumps(response).encode() + b"\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def run():
+        server = await asyncio.start_unix_server(client, path=socket_path, limit=2 ** 20)
+        stop = asyncio.Event()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            asyncio.get_running_loop().add_signal_handler(signum, stop.set)
+        print(f"Serving {DB_PATH} on {socket_path} with {workers} workers")
+        async with server:
+            await stop.wait()
+
+    try:
+        asyncio.run(run())
+    finally:
+        pool.shutdown()
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+
+def request(op: str, args: dict = None, socket_path: str = None):
+    import socket
+
+    with socket.socket(socket.AF_UNIX) as sock:
+        sock.connect(socket_path or SOCKET_PATH)
+        sock.sendall(json.dumps({"op": op, "args": args or {}}).encode() + b"\n")
+        with sock.makefile("rb") as f:
+            response = json.loads(f.readline())
+    if not response["ok"]:
+        raise ValueError(response["error"])
+    return response["result"]
+
+# rich is only imported by commands that render a table, one-line commands
+# and the TSV stream path never pay for it
+_console = None
+
+def get_console():
+    global _console
+    if _console is None:
+        start = time.perf_counter()
+        from rich.console import Console
+        _console = Console()
+        if _profiler:
+            _profiler.add("render", time.perf_counter() - start)
+            _console.print = _profiler.timer("render", _console.print)
+    return _console
+
+def rich_table():
+    # importing rich is most of a small command's render time, --profile
+    # counts it there
+    start = time.perf_counter()
+    from rich.table import Table
+    if _profiler:
+        _profiler.add("render", time.perf_counter() - start)
+    return Table
+
+def notice(text: str, style: str = None):
+    if _console is not None:
+        _console.print(text, style=style)
+    else:
+        print(text)
+
+STUDENT_COLUMNS = {
+    "rank": ("Rank", {"justify": "right"}),
+    "id": ("ID", {"style": "cyan", "justify": "right"}),
+    "name": ("Name", {}),
+    "email": ("Email", {}),
+    "major": ("Major", {}),
+    "gpa": ("GPA", {"justify": "right"}),
+    "status": ("Status", {}),
+    "last_updated": ("Last Updated", {}),
+}
+
+def student_cells(s, fields):
+    cells = []
+    for field in fields:
+        if field == "gpa" and s["gpa"] is not None:
+            cells.append(f"{s['gpa']:.1f}")
+        else:
+            cells.append(str(s[field]) if s[field] is not None else "-")
+    return cells
+
+def students_table(title, fields, rows):
+    Table = rich_table()
+
+    table = Table(title=title)
+    for field in fields:
+        header, options = STUDENT_COLUMNS[field]
+        table.add_column(header, **options)
+    for s in rows:
+        table.add_row(*student_cells(s, fields))
+    return table
+
+def print_students(chunks, title, fields, stream=False):
+    # returns (rows printed, last row) so callers can offer the next page
+    count = 0
+    last = None
+
+    if not stream:
+        rows = [s for chunk in chunks for s in chunk]
+        if rows:
+            get_console().print(students_table(title, fields, rows))
+            return len(rows), rows[-1]
+        return 0, None
+
+    if not sys.stdout.isatty():
+        write = sys.stdout.write
+        write("\t".join(fields) + "\n")
+        for chunk in chunks:
+            write("".join(
+                "\t".join("" if s[f] is None else str(s[f]) for f in fields) + "\n"
+                for s in chunk
+            ))
+            count += len(chunk)
+            last = chunk[-1]
+        return count, last
+
+    for chunk in chunks:
+        get_console().print(students_table(
+            f"{title} ({count + 1}-{count + len(chunk)})", fields, chunk))
+        count += len(chunk)
+        last = chunk[-1]
+    return count, last
+
+def print_next_page(count, last, limit):
+    if limit is not None and count == limit and last is not None:
+        gpa = "none" if last["gpa"] is None else last["gpa"]
+        hint = f"Next page: --after {gpa},{last['id']}"
+        if sys.stdout.isatty():
+            notice(hint, style="cyan")
+        else:
+            print(hint, file=sys.stderr)
+
+def parse_cursor(value: str):
+    # "none" continues among the students without a GPA, who are listed last
+    try:
+        gpa, last_id = value.split(",")
+        return (None if gpa.strip().lower() == "none" else float(gpa)), int(last_id)
+    except ValueError:
+        raise argparse.ArgumentTypeError("cursor must be: 'gpa,id' or 'none,id'")
 
-students_in_major = subparser.add_parser("find-major")
-students_in_major.add_argument("--major", required=True, type=str)
+def add_page_arguments(command):
+    command.add_argument("--limit", type=int)
+    command.add_argument("--after", type=parse_cursor, metavar="GPA,ID")
+    command.add_argument("--stream", action="store_true")
+    command.add_argument("--chunk-size", type=int, default=1000)
 
-update_gpa = subparser.add_parser("update-gpa")
-update_gpa.add_argument("--id", required=True, type=int)
-update_gpa.add_argument("--gpa", required=True, type=float)
+def build_parser():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--profile", action="store_true",
+                        help="time each phase and SQL statement, printed to stderr")
+    parser.add_argument("--profile-output", type=str,
+                        help="also write cProfile stats here, read them with pstats")
+    parser.add_argument("--trace", action="store_true", help="print every SQL statement to stderr")
+    subparser = parser.add_subparsers(dest="command")
 
-delete = subparser.add_parser("delete")
-delete.add_argument("--id", required=True, type=int)
+    start_db = subparser.add_parser("init_db")
 
-args = parser.parse_args()
-console = Console()
+    add = subparser.add_parser("add")
+    add.add_argument("--name", required=True, type=str)
+    add.add_argument("--email", required=True, type=str)
+    add.add_argument("--major", required=True, type=str)
+    add.add_argument("--gpa", required=True, type=float)
+    add.add_argument("--status", type=str, default="active")
 
-if args.command == "init_db":
+    view_students = subparser.add_parser("list")
+    view_students.add_argument("--status", type=str)
+    view_students.add_argument("--include-archived", action="store_true")
+    add_page_arguments(view_students)
+
+    students_in_major = subparser.add_parser("find-major")
+    students_in_major.add_argument("--major", required=True, type=str)
+    students_in_major.add_argument("--include-archived", action="store_true")
+    add_page_arguments(students_in_major)
+
+    update_gpa = subparser.add_parser("update-gpa")
+    update_gpa.add_argument("--id", type=int)
+    update_gpa.add_argument("--gpa", type=float)
+    update_gpa.add_argument("--from-file", type=str)
+
+    bulk_status = subparser.add_parser("bulk-status")
+    bulk_status.add_argument("--to", required=True, type=str)
+    bulk_status.add_argument("--below", type=float)
+    bulk_status.add_argument("--at-least", type=float)
+    bulk_status.add_argument("--from-status", type=str)
+    bulk_status.add_argument("--major", type=str)
+
+    delete = subparser.add_parser("delete")
+    delete.add_argument("--id", required=True, type=int)
+
+    import_file = subparser.add_parser("import")
+    import_file.add_argument("--file", required=True, type=str)
+    import_file.add_argument("--format", choices=["csv", "jsonl"])
+    import_file.add_argument("--rejects", type=str)
+    import_file.add_argument("--batch-size", type=int, default=5000)
+    import_file.add_argument("--workers", type=int, default=1,
+                             help="validation processes, 0 for one per CPU")
+
+    explain = subparser.add_parser("explain")
+
+    search = subparser.add_parser("search")
+    search.add_argument("text", type=str)
+    search.add_argument("--field", choices=["name", "email", "major"])
+    search.add_argument("--limit", type=int, default=50)
+    search.add_argument("--stream", action="store_true")
+    search.add_argument("--chunk-size", type=int, default=1000)
+
+    history = subparser.add_parser("history")
+    history.add_argument("--id", required=True, type=int)
+
+    as_of = subparser.add_parser("as-of")
+    as_of.add_argument("--at", required=True, type=str)
+    as_of.add_argument("--status", type=str)
+    as_of.add_argument("--major", type=str)
+    as_of.add_argument("--stream", action="store_true")
+    as_of.add_argument("--chunk-size", type=int, default=1000)
+
+    stats = subparser.add_parser("stats")
+    stats.add_argument("--by", choices=["major", "status"], default="major")
+    stats.add_argument("--histogram", action="store_true")
+    stats.add_argument("--recompute", action="store_true")
+
+    serve_socket = subparser.add_parser("serve")
+    serve_socket.add_argument("--socket", type=str)
+    serve_socket.add_argument("--workers", type=int, default=4)
+    serve_socket.add_argument("--cache-size", type=int, default=0)
+    serve_socket.add_argument("--cache-ttl", type=float, default=30.0)
+
+    rebalance_shards = subparser.add_parser("rebalance")
+    rebalance_shards.add_argument("--count", required=True, type=int)
+    rebalance_shards.add_argument("--key", choices=["email", "major"])
+    rebalance_shards.add_argument("--manifest", type=str,
+                                  help="defaults to $SUCCESS_TRACKER_SHARDS or success_tracker.shards.json")
+
+    backup = subparser.add_parser("backup")
+    backup.add_argument("--output", required=True, type=str)
+    backup.add_argument("--pages", type=int, default=256, help="pages copied per step")
+    backup.add_argument("--pause", type=float, default=0.0, help="seconds to wait between steps")
+
+    compact = subparser.add_parser("compact")
+    compact.add_argument("--pages", type=int, help="free at most this many pages, default all")
+
+    top = subparser.add_parser("top")
+    top.add_argument("--n", type=int, default=10)
+    top.add_argument("--major", type=str)
+
+    rank = subparser.add_parser("rank")
+    rank.add_argument("--id", required=True, type=int)
+
+    archive = subparser.add_parser("archive")
+    archive.add_argument("--before", type=str, help="move graduates last updated before this time")
+    archive.add_argument("--days", type=int, help="move graduates not updated for this many days")
+
+    export = subparser.add_parser("export")
+    export.add_argument("--output", type=str, default="-")
+    export.add_argument("--format", choices=["csv", "jsonl"])
+    export.add_argument("--gzip", action="store_true")
+    export.add_argument("--status", type=str)
+    export.add_argument("--major", type=str)
+
+    return parser
+
+COMMANDS = {}
+
+def command(name: str):
+    def register(handler):
+        COMMANDS[name] = handler
+        return handler
+    return register
+
+@command("init_db")
+def run_init_db(args):
     init_db()
 
-elif args.command == "add":
+@command("add")
+def run_add(args):
     student_id = add_student(
         args.name,
         args.email,
@@ -129,73 +2302,380 @@ elif args.command == "add":
     )
     print(f"Student {args.name} added with ID {student_id}")
 
-elif args.command == "update-gpa":
+@command("update-gpa")
+def run_update_gpa(args):
+    if args.from_file:
+        if args.id is not None or args.gpa is not None:
+            raise SystemExit("update-gpa: use either --from-file or --id/--gpa")
+        try:
+            updates = read_gpa_updates(args.from_file)
+            rowcount = update_student_gpas(updates)
+        except ValueError as e:
+            print(f"{e}, no GPAs were changed")
+            return
+        print(f"Updated GPA for {len(updates)} students from {args.from_file}\n ({rowcount} rows affected)")
+        return
+
+    if args.id is None or args.gpa is None:
+        raise SystemExit("update-gpa: --id and --gpa are required without --from-file")
     rowcount = update_student_gpa(args.id, args.gpa)
-    print(f"Deleted student with ID: {args.id}\n ({rowcount} rows affected)")
+    print(f"Updated GPA for student ID {args.id}\n ({rowcount} rows affected)")
+
+@command("bulk-status")
+def run_bulk_status(args):
+    try:
+        rowcount = update_status_where(
+            args.to,
+            args.below,
+            args.at_least,
+            args.from_status,
+            args.major
+        )
+    except ValueError as e:
+        print(str(e))
+        return
+    print(f"Moved students to status '{args.to}'\n ({rowcount} rows affected)")
 
-elif args.command == "delete":
+@command("delete")
+def run_delete(args):
     rowcount = delete_student(args.id)
-    print(f"Updated GPA for student ID {args.id}\n ({rowcount} rows affected)")
+    print(f"Deleted student with ID: {args.id}\n ({rowcount} rows affected)")
+
+@command("import")
+def run_import(args):
+    imported, rejected, elapsed = import_students(
+        args.file,
+        args.format,
+        args.rejects,
+        args.batch_size,
+        workers=args.workers or None
+    )
+    rate = (imported + rejected) / elapsed if elapsed else 0
+    print(f"Imported {imported} students, rejected {rejected} rows")
+    print(f" ({elapsed:.2f}s, {rate:,.0f} rows/s)")
+    if rejected and args.rejects:
+        print(f" Rejected rows written to {args.rejects}")
 
+@command("export")
+def run_export(args):
+    fmt = args.format
+    if fmt is None:
+        fmt = "jsonl" if args.output.removesuffix(".gz").endswith(".jsonl") else "csv"
 
-elif args.command == "list":
     try:
-        students = list_students(args.status)
+        with open_export(args.output, args.gzip) as out:
+            count = export_students(out, fmt, args.status, args.major)
+        print(f"Exported {count} students to {args.output}",
+              file=sys.stderr if args.output == "-" else sys.stdout)
+    except ValueError as e:
+        print(str(e))
 
-        if not students:
-            console.print("No students found.", style="yellow")
-        else:
-            table = Table(title="Students")
-
-            table.add_column("ID", style="cyan", justify="right")
-            table.add_column("Name")
-            table.add_column("Email")
-            table.add_column("Major")
-            table.add_column("GPA", justify="right")
-            table.add_column("Status")
-            table.add_column("Last Updated")
-
-            for s in students:
-                table.add_row(
-                    str(s["id"]),
-                    s["name"],
-                    s["email"],
-                    s["major"],
-                    f"{s['gpa']:.1f}",
-                    s["status"],
-                    s["last_updated"] or "-"
-                )
-
-            console.print(table)
+@command("search")
+def run_search(args):
+    try:
+        count, _ = print_students(
+            search_students(args.text, args.field, args.limit, args.chunk_size),
+            f"Students matching '{args.text}'",
+            ["id", "name", "email", "major", "gpa", "status"],
+            args.stream
+        )
+        if not count:
+            notice(f"No students match '{args.text}'", style="yellow")
+    except ValueError as e:
+        notice(str(e), style="red")
+
+@command("history")
+def run_history(args):
+    changes = student_history(args.id)
+    if not changes:
+        notice(f"No history for student ID {args.id}", style="yellow")
+        return
+
+    Table = rich_table()
+
+    labels = {"I": "added", "U": "updated", "D": "deleted", "A": "archived"}
+    table = Table(title=f"History of student {args.id}")
+
+    table.add_column("Changed At")
+    table.add_column("Change")
+    table.add_column("GPA", justify="right")
+    table.add_column("Status")
+
+    for change in changes:
+        table.add_row(
+            change["changed_at"],
+            labels[change["op"]],
+            f"{change['gpa']:.1f}" if change["gpa"] is not None else "-",
+            change["status"] or "-"
+        )
+
+    get_console().print(table)
+
+@command("as-of")
+def run_as_of(args):
+    try:
+        count, _ = print_students(
+            iter_students_as_of(args.at, args.status, args.major, args.chunk_size),
+            f"Students as of {args.at}",
+            ["id", "name", "email", "major", "gpa", "status", "last_updated"],
+            args.stream
+        )
+        if not count:
+            notice("No students found.", style="yellow")
+    except ValueError as e:
+        notice(str(e), style="red")
+
+@command("stats")
+def run_stats(args):
+    if args.recompute:
+        groups, mismatched = recompute_stats()
+        print(f"Summary rebuilt: {groups} groups, {mismatched} did not match the students table")
+
+    summary = gpa_stats(args.by)
+    if not summary:
+        notice("No students found.", style="yellow")
+        return
+
+    Table = rich_table()
+
+    table = Table(title=f"GPA by {args.by}")
 
+    table.add_column(args.by.capitalize())
+    table.add_column("Students", justify="right")
+    table.add_column("Mean", justify="right")
+    table.add_column("Min", justify="right")
+    table.add_column("Max", justify="right")
+    buckets = [b / 2 for b in range(9)]
+    if args.histogram:
+        for b in buckets:
+            table.add_column(f"{b:.1f}", justify="right")
+
+    for key, entry in summary.items():
+        row = [
+            key,
+            str(entry["count"]),
+            f"{entry['mean']:.2f}" if entry["mean"] is not None else "-",
+            f"{entry['min']:.1f}" if entry["min"] is not None else "-",
+            f"{entry['max']:.1f}" if entry["max"] is not None else "-",
+        ]
+        if args.histogram:
+            row += [str(entry["histogram"].get(b, "")) for b in buckets]
+        table.add_row(*row)
+
+    get_console().print(table)
+
+@command("serve")
+def run_serve(args):
+    if args.cache_size:
+        enable_query_cache(args.cache_size, args.cache_ttl)
+    try:
+        serve(args.socket, args.workers)
+    except RuntimeError as e:
+        print(str(e))
+
+@command("rebalance")
+def run_rebalance(args):
+    try:
+        moved, targets = rebalance(args.count, args.key, args.manifest)
     except ValueError as e:
-        console.print(str(e), style="red")
+        notice(str(e), style="red")
+        return
+    manifest = args.manifest or SHARD_MANIFEST or "success_tracker.shards.json"
+    print(f"Moved {moved} students into {len(targets)} shards")
+    for target in targets:
+        print(f"  {target}")
+    if not SHARD_MANIFEST:
+        print(f"Set SUCCESS_TRACKER_SHARDS={manifest} to use them")
+        print(f"{DB_PATH} is no longer used once it is set, keep it as a backup or delete it")
 
-elif args.command == "find-major":
-    students = find_students_in_major(args.major)
+@command("backup")
+def run_backup(args):
+    def progress(path, done, total):
+        print(f"\r{os.path.basename(path)}: {done}/{total} pages", end="", file=sys.stderr)
+        if done == total:
+            print(file=sys.stderr)
 
+    start = time.perf_counter()
+    try:
+        copied = backup_database(args.output, args.pages, progress if sys.stderr.isatty() else None,
+                                 args.pause)
+    except (ValueError, sqlite3.Error) as e:
+        notice(str(e), style="red")
+        return
+    for path, target, pages in copied:
+        print(f"Backed up {path} to {target} ({pages} pages)")
+    print(f" ({time.perf_counter() - start:.2f}s)")
+
+@command("compact")
+def run_compact(args):
+    try:
+        results = compact_database(args.pages)
+    except ValueError as e:
+        notice(str(e), style="red")
+        return
+    for result in results:
+        note = ", rebuilt once to enable incremental vacuum" if result["rebuilt"] else ""
+        print(f"Compacted {result['path']}: {result['before'] / 1024:,.0f} KiB -> "
+              f"{result['after'] / 1024:,.0f} KiB ({result['free_pages']} free pages{note})")
+
+@command("top")
+def run_top(args):
+    try:
+        students = top_students(args.n, args.major)
+    except ValueError as e:
+        notice(str(e), style="red")
+        return
     if not students:
-        console.print(
-            f"No students found in major '{args.major}'", style="yellow")
-    else:
-        table = Table(title=f"Students in {args.major}")
+        notice("No students found.", style="yellow")
+        return
+    fields = ["rank", "id", "name", "gpa", "status"] if args.major else ["major", "rank", "id", "name", "gpa", "status"]
+    title = f"Top {args.n} in {args.major}" if args.major else f"Top {args.n} per major"
+    print_students([students], title, fields)
+
+@command("rank")
+def run_rank(args):
+    student = student_rank(args.id)
+    if student is None:
+        notice(f"No ranked student with ID {args.id}", style="yellow")
+        return
+    print(f"{student['name']} (ID {student['id']}) is ranked {student['rank']} of "
+          f"{student['major_size']} in {student['major']} with GPA {student['gpa']:.2f}, "
+          f"percentile {student['percentile']:.1f}")
 
-        table.add_column("ID", style="cyan", justify="right")
-        table.add_column("Name")
-        table.add_column("Email")
-        table.add_column("GPA", justify="right")
-        table.add_column("Status")
+@command("archive")
+def run_archive(args):
+    if (args.before is None) == (args.days is None):
+        raise SystemExit("archive: give one of --before or --days")
+    before = args.before
+    if before is None:
+        before = (datetime.datetime.now() - datetime.timedelta(days=args.days)).isoformat("T", "seconds")
+    try:
+        moved, archives = archive_students(before)
+    except ValueError as e:
+        notice(str(e), style="red")
+        return
+    print(f"Archived {moved} graduated students last updated before {before} to {', '.join(archives)}")
+    if moved:
+        print(" run compact to hand the freed pages back to the filesystem")
 
-        for s in students:
-            table.add_row(
-                str(s["id"]),
-                s["name"],
-                s["email"],
-                f"{s['gpa']:.1f}",
-                s["status"]
-            )
+@command("explain")
+def run_explain(args):
+    version = schema_version(get_connection(shard_paths()[0]))
+    if version < len(MIGRATIONS):
+        print(f"Schema is at version {version} of {len(MIGRATIONS)}, run init_db first")
 
-        console.print(table)
+    regressions = 0
+    for name, (sql, details) in explain_queries().items():
+        print(f"{name}: {' '.join(sql.split())}")
+        for detail in details:
+            if is_full_scan(detail, sql):
+                regressions += 1
+                print(f"  ! {detail}")
+            else:
+                print(f"    {detail}")
+
+    if regressions:
+        print(f"{regressions} full scan(s) or sorts found")
+        raise SystemExit(1)
+    print("All queries use indexes")
+
+@command("list")
+def run_list(args):
+    try:
+        chunks = iter_students(
+            status=args.status, after=args.after, limit=args.limit, chunk_size=args.chunk_size,
+            include_archived=args.include_archived)
+        count, last = print_students(
+            chunks,
+            "Students",
+            ["id", "name", "email", "major", "gpa", "status", "last_updated"],
+            args.stream
+        )
+
+        if not count:
+            notice("No students found.", style="yellow")
+        print_next_page(count, last, args.limit)
+
+    except ValueError as e:
+        notice(str(e), style="red")
+
+@command("find-major")
+def run_find_major(args):
+    chunks = iter_students(
+        major=args.major, after=args.after, limit=args.limit, chunk_size=args.chunk_size,
+        include_archived=args.include_archived)
+    count, last = print_students(
+        chunks,
+        f"Students in {args.major}",
+        ["id", "name", "email", "gpa", "status"],
+        args.stream
+    )
+
+    if not count:
+        notice(f"No students found in major '{args.major}'", style="yellow")
+    print_next_page(count, last, args.limit)
+
+def print_profile(profiler, total: float):
+    from rich.console import Console
+    from rich.table import Table
+
+    phases = Table(title=f"Profile ({total * 1000:.1f} ms)")
+    phases.add_column("Phase")
+    phases.add_column("ms", justify="right")
+    phases.add_column("%", justify="right")
+    other = total - sum(profiler.phases.values())
+    for phase, seconds in [*profiler.phases.items(), ("other python", other)]:
+        phases.add_row(phase, f"{seconds * 1000:.2f}", f"{seconds / total:.0%}")
+
+    statements = Table(title=f"SQL ({profiler.traced} statements run by sqlite, "
+                             "including triggers and transactions)")
+    statements.add_column("SQL", overflow="fold")
+    statements.add_column("Calls", justify="right")
+    statements.add_column("Rows", justify="right")
+    statements.add_column("ms", justify="right")
+    ordered = sorted(profiler.statements.items(), key=lambda s: s[1]["seconds"], reverse=True)
+    for sql, entry in ordered:
+        statements.add_row(sql, str(entry["calls"]), str(entry["rows"]), f"{entry['seconds'] * 1000:.2f}")
+
+    # stderr, so a profiled --stream still pipes clean TSV
+    console = Console(stderr=True)
+    console.print(phases)
+    console.print(statements)
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    handler = COMMANDS.get(args.command)
+    if handler is None:
+        parser.print_help()
+        return
+    if not (args.profile or args.profile_output or args.trace):
+        handler(args)
+        return
+
+    profiler = enable_profiling(args.trace)
+    start = time.perf_counter()
+    # the report matters most when the command fails, so it is printed on
+    # the way out either way
+    try:
+        if args.profile_output:
+            import cProfile
+
+            stats = cProfile.Profile()
+            try:
+                stats.runcall(handler, args)
+            finally:
+                stats.dump_stats(args.profile_output)
+        else:
+            handler(args)
+    finally:
+        if args.profile or args.profile_output:
+            print_profile(profiler, time.perf_counter() - start)
+            if args.profile_output:
+                print(f"cProfile stats written to {args.profile_output}", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
 
 
 # python3 success_tracker.py init_db
@@ -216,13 +2696,52 @@ elif args.command == "find-major":
 
 # python3 success_tracker.py delete --id 3
 
-# decorators + main 
+# python3 success_tracker.py update-gpa --from-file term_gpas.csv
+# python3 success_tracker.py bulk-status --to probation --below 2.0 --from-status active
+
+# python3 success_tracker.py list --limit 50
+# python3 success_tracker.py list --limit 50 --after 3.2,17
+# python3 success_tracker.py list --stream > students.tsv
+
+# python3 success_tracker.py import --file students.csv --rejects rejects.csv
+# python3 success_tracker.py import --file students.jsonl --batch-size 10000
+# python3 success_tracker.py import --file registrar.csv --workers 0
+
+# python3 success_tracker.py explain
+
+# python3 success_tracker.py history --id 2
+# python3 success_tracker.py as-of --at 2025-12-21T16:25:00 --major cis
 
+# python3 success_tracker.py search "haya"
+# python3 success_tracker.py search "mu gma" --field email
 
+# python3 success_tracker.py stats
+# python3 success_tracker.py stats --by status --histogram
+# python3 success_tracker.py stats --recompute
 
+# python3 success_tracker.py serve --socket /tmp/tracker.sock
+# python3 success_tracker.py serve --socket /tmp/tracker.sock --cache-size 512 --cache-ttl 60
+# python3 tracker_client.py --socket /tmp/tracker.sock find-major major=cis
 
+# python3 success_tracker.py export --output students.csv.gz
+# python3 success_tracker.py export --format jsonl --status probation > probation.jsonl
 
+# python3 success_tracker.py rebalance --count 4 --manifest shards.json
+# SUCCESS_TRACKER_SHARDS=shards.json python3 success_tracker.py stats
+# SUCCESS_TRACKER_SHARDS=shards.json python3 success_tracker.py rebalance --count 8 --key major
 
+# python3 success_tracker.py backup --output backups/success_tracker.db
+# python3 success_tracker.py backup --output backups/success_tracker.db --pages 64 --pause 0.01
+# python3 success_tracker.py compact
 
+# python3 success_tracker.py --profile list --limit 50
+# python3 success_tracker.py --profile --profile-output list.pstats list --stream > /dev/null
+# python3 success_tracker.py --trace update-gpa --id 2 --gpa 3.4
 
+# python3 success_tracker.py top --n 3
+# python3 success_tracker.py top --major cis --n 10
+# python3 success_tracker.py rank --id 2
 
+# python3 success_tracker.py archive --days 365
+# python3 success_tracker.py archive --before 2024-06-30
+# python3 success_tracker.py list --include-archived --status graduated
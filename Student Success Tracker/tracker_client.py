@@ -0,0 +1,53 @@
+# Thin client for `success_tracker.py serve`. It only imports the standard
+# library pieces it needs, so a lookup costs an interpreter start and a socket
+# round trip instead of rich, argparse and opening the database.
+#
+#   python3 tracker_client.py list status=probation limit=20
+#   python3 tracker_client.py update-gpa id=2 gpa=3.5
+#   python3 tracker_client.py --socket /tmp/tracker.sock add name=Haya email=haya@gmail.com major=cs gpa=3.6
+
+import json
+import os
+import socket
+import sys
+
+
+def parse_value(value: str):
+    try:
+        return json.loads(value)
+    except ValueError:
+        return value
+
+
+def main(argv):
+    socket_path = os.environ.get("SUCCESS_TRACKER_SOCKET", "success_tracker.sock")
+    if len(argv) >= 2 and argv[0] == "--socket":
+        socket_path, argv = argv[1], argv[2:]
+    if not argv:
+        print("usage: tracker_client.py [--socket PATH] OP [key=value ...]", file=sys.stderr)
+        return 2
+
+    op, args = argv[0], {}
+    for pair in argv[1:]:
+        key, _, value = pair.partition("=")
+        args[key.replace("-", "_")] = parse_value(value)
+
+    with socket.socket(socket.AF_UNIX) as sock:
+        sock.connect(socket_path)
+        sock.sendall(json.dumps({"op": op, "args": args}).encode() + b"\n")
+        with sock.makefile("rb") as f:
+            response = json.loads(f.readline())
+
+    if not response["ok"]:
+        print(response["error"], file=sys.stderr)
+        return 1
+    result = response["result"]
+    if isinstance(result, list):
+        sys.stdout.write("".join(json.dumps(row) + "\n" for row in result))
+    else:
+        print(json.dumps(result))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,191 @@
+import hashlib
+import os
+
+import numpy as np
+
+from bank import InvalidValue
+
+
+class BatchResult:
+    OK, INVALID_AMOUNT, UNKNOWN_ACCOUNT, NOT_ENOUGH_BALANCE = 0, 1, 2, 3
+    REASONS = ("ok", "Amount must be greater than zero", "Unknown account", "Not enough balance")
+
+    def __init__(self, account_ids, status):
+        self.account_ids = account_ids
+        self.status = status
+
+    @property
+    def applied(self):
+        return self.status == self.OK
+
+    def __len__(self):
+        return len(self.status)
+
+    def rejects(self):
+        for row in np.flatnonzero(self.status != self.OK):
+            yield int(row), int(self.account_ids[row]), self.REASONS[self.status[row]]
+
+
+class AccountStore:
+    # accounts as rows of typed columns: balances in int64 cents, pins as
+    # salted 64 bit hashes and holders as one utf-8 buffer with offsets.
+    # Account ids are row numbers
+    BATCH_ROUNDS = 4
+
+    def __init__(self, capacity: int = 1024):
+        capacity = max(capacity, 1)
+        self._count = 0
+        self._balances = np.zeros(capacity, dtype=np.int64)
+        self._pins = np.zeros(capacity, dtype=np.uint64)
+        self._offsets = np.zeros(capacity + 1, dtype=np.int64)
+        self._holders = bytearray()
+        self._salt = os.urandom(16)
+
+    def __len__(self):
+        return self._count
+
+    def _grow(self, needed):
+        capacity = len(self._balances)
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        for name in ("_balances", "_pins"):
+            column = np.zeros(capacity, dtype=getattr(self, name).dtype)
+            column[:self._count] = getattr(self, name)[:self._count]
+            setattr(self, name, column)
+        offsets = np.zeros(capacity + 1, dtype=np.int64)
+        offsets[:self._count + 1] = self._offsets[:self._count + 1]
+        self._offsets = offsets
+
+    def _hash_pin(self, pin_code):
+        digest = hashlib.blake2b(str(pin_code).encode(), digest_size=8, key=self._salt).digest()
+        return int.from_bytes(digest, "little")
+
+    @staticmethod
+    def to_cents(amounts):
+        amounts = np.asarray(amounts, dtype=np.float64)
+        cents = np.zeros(amounts.shape, dtype=np.int64)
+        finite = np.isfinite(amounts)
+        cents[finite] = np.rint(amounts[finite] * 100)
+        return cents
+
+    def open_accounts(self, holders, balances, pins):
+        holders = list(holders)
+        cents = self.to_cents(balances)
+        if not (len(holders) == len(cents) == len(pins)):
+            raise InvalidValue("holders, balances and pins must have the same length")
+        if not all(isinstance(pin, (int, np.integer)) for pin in pins):
+            raise InvalidValue("Pin is Invalid")
+        if (cents <= 0).any():
+            raise InvalidValue("Amount must be greater than zero")
+        encoded = [holder.encode("utf-8") for holder in holders]
+        if not all(holder.strip() for holder in encoded):
+            raise InvalidValue("Account holder must not be empty")
+
+        start, end = self._count, self._count + len(holders)
+        self._grow(end)
+        self._balances[start:end] = cents
+        self._pins[start:end] = [self._hash_pin(pin) for pin in pins]
+        self._offsets[start + 1:end + 1] = self._offsets[start] + np.cumsum([len(h) for h in encoded])
+        self._holders += b"".join(encoded)
+        self._count = end
+        return np.arange(start, end, dtype=np.int64)
+
+    def open_account(self, account_holder: str, balance: float, pin_code: int):
+        return int(self.open_accounts([account_holder], [balance], [pin_code])[0])
+
+    def _check_id(self, account_id):
+        if not 0 <= account_id < self._count:
+            raise InvalidValue("Unknown account")
+
+    def holder(self, account_id):
+        self._check_id(account_id)
+        start, end = self._offsets[account_id], self._offsets[account_id + 1]
+        return self._holders[start:end].decode("utf-8")
+
+    def balance(self, account_id, pin):
+        self.check_pin(account_id, pin)
+        return self._balances[account_id] / 100
+
+    def check_pin(self, account_id, pin):
+        self._check_id(account_id)
+        if self._pins[account_id] != self._hash_pin(pin):
+            raise InvalidValue("Pin is Incorrect")
+
+    def set_pin_code(self, account_id, pin_code):
+        self._check_id(account_id)
+        if not isinstance(pin_code, (int, np.integer)):
+            raise InvalidValue("Pin is Invalid")
+        self._pins[account_id] = self._hash_pin(pin_code)
+
+    def deposit(self, account_id, amount):
+        result = self.apply_batch([account_id], [amount])
+        for _, _, reason in result.rejects():
+            raise InvalidValue(reason)
+
+    def withdraw(self, account_id, amount, pin):
+        self.check_pin(account_id, pin)
+        result = self.apply_batch([account_id], [amount], withdraw=[True])
+        for _, _, reason in result.rejects():
+            raise InvalidValue(reason)
+
+    def apply_batch(self, account_ids, amounts, withdraw=None):
+        # posts rows as if deposit/withdraw ran on each in order: amounts must
+        # be positive and a withdrawal may not overdraw. Rejected rows are
+        # skipped and reported in the result, the rest are applied
+        ids = np.asarray(account_ids, dtype=np.int64)
+        cents = self.to_cents(amounts)
+        if ids.shape != cents.shape:
+            raise InvalidValue("account_ids and amounts must have the same length")
+        status = np.zeros(len(ids), dtype=np.int8)
+        status[(ids < 0) | (ids >= self._count)] = BatchResult.UNKNOWN_ACCOUNT
+        status[cents <= 0] = BatchResult.INVALID_AMOUNT
+
+        deltas = np.where(status == BatchResult.OK, cents, 0)
+        if withdraw is not None:
+            withdraw = np.asarray(withdraw, dtype=bool)
+            deltas[withdraw] *= -1
+
+        if withdraw is None or not withdraw.any():
+            valid = status == BatchResult.OK
+            np.add.at(self._balances, ids[valid], deltas[valid])
+            return BatchResult(ids, status)
+
+        # running balance of every account through the batch, in row order.
+        # The first row that takes an account below zero is rejected, which
+        # changes every later row of that account, so each round recomputes
+        # only the accounts that were short. Few accounts need more than a
+        # couple of rounds, what is left after that is replayed row by row
+        rows = np.flatnonzero(status == BatchResult.OK)
+        order = rows[np.argsort(ids[rows], kind="stable")]
+        sorted_ids, sorted_deltas = ids[order], deltas[order]
+        pending = np.arange(len(order))
+        for _ in range(self.BATCH_ROUNDS):
+            if not len(pending):
+                break
+            group_ids, group_deltas = sorted_ids[pending], sorted_deltas[pending]
+            running = np.cumsum(group_deltas)
+            starts = np.flatnonzero(np.diff(group_ids, prepend=-1) != 0)
+            running -= np.repeat(running[starts] - group_deltas[starts], np.diff(starts, append=len(pending)))
+            running += self._balances[group_ids]
+            negative = np.flatnonzero(running < 0)
+            first = negative[np.diff(group_ids[negative], prepend=-1) != 0]
+            sorted_deltas[pending[first]] = 0
+            status[order[pending[first]]] = BatchResult.NOT_ENOUGH_BALANCE
+            pending = pending[np.isin(group_ids, group_ids[first])]
+
+        settled = np.ones(len(order), dtype=bool)
+        settled[pending] = False
+        np.add.at(self._balances, sorted_ids[settled], sorted_deltas[settled])
+        if len(pending):
+            touched = np.unique(sorted_ids[pending])
+            current = dict(zip(touched.tolist(), self._balances[touched].tolist()))
+            for row, account_id, delta in zip(order[pending].tolist(), sorted_ids[pending].tolist(),
+                                              sorted_deltas[pending].tolist()):
+                if current[account_id] + delta < 0:
+                    status[row] = BatchResult.NOT_ENOUGH_BALANCE
+                else:
+                    current[account_id] += delta
+            self._balances[touched] = list(current.values())
+        return BatchResult(ids, status)
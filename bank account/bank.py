@@ -1,22 +1,321 @@
+from array import array
+from bisect import bisect_left
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import contextlib
+import csv
+import datetime
+import hashlib
+import itertools
+import os
+import struct
+import threading
+import time
+import zlib
+
+
 class InvalidValue(Exception):
     pass
 
 
+class Transaction:
+    __slots__ = ("kind", "amount", "balance_after", "timestamp")
+
+    def __init__(self, kind, amount, balance_after, timestamp):
+        self.kind = kind
+        self.amount = amount
+        self.balance_after = balance_after
+        self.timestamp = timestamp
+
+    def __repr__(self):
+        return (f"Transaction({self.kind!r}, {self.amount!r}, "
+                f"{self.balance_after!r}, {self.timestamp!r})")
+
+    def __str__(self):
+        verb = "Added" if self.kind == "deposit" else "Withdrew"
+        return f"{verb}: {self.amount}, current Balance : {self.balance_after}"
+
+
+class TransactionHistory:
+    # one typed column per field instead of one object per entry, about 25
+    # bytes a transaction. Transaction records are only built when read
+    KINDS = ("deposit", "withdraw")
+    # the spare high bits of the kind byte remember which values were ints,
+    # so they read back, and print, as they were passed in
+    KIND_MASK, AMOUNT_INT, BALANCE_INT = 0x3F, 0x40, 0x80
+
+    def __init__(self):
+        self._kinds = array("B")
+        self._amounts = array("d")
+        self._balances = array("d")
+        self._timestamps = array("d")
+
+    def append(self, kind, amount, balance_after, timestamp=None):
+        # timestamps never go down, a clock stepped back or an older
+        # timestamp passed in is recorded as the previous one, so select can
+        # binary search them
+        if timestamp is None:
+            timestamp = time.time()
+        if self._timestamps and timestamp < self._timestamps[-1]:
+            timestamp = self._timestamps[-1]
+        self._kinds.append(self.KINDS.index(kind)
+                           | (self.AMOUNT_INT if isinstance(amount, int) else 0)
+                           | (self.BALANCE_INT if isinstance(balance_after, int) else 0))
+        self._amounts.append(amount)
+        self._balances.append(balance_after)
+        self._timestamps.append(timestamp)
+
+    def __len__(self):
+        return len(self._kinds)
+
+    def __getitem__(self, index):
+        code = self._kinds[index]
+        amount, balance = self._amounts[index], self._balances[index]
+        return Transaction(self.KINDS[code & self.KIND_MASK],
+                           int(amount) if code & self.AMOUNT_INT else amount,
+                           int(balance) if code & self.BALANCE_INT else balance,
+                           self._timestamps[index])
+
+    def __iter__(self):
+        return self.select()
+
+    def select(self, since=None, kind=None, limit=None):
+        if isinstance(since, datetime.datetime):
+            since = since.timestamp()
+        if kind is not None and kind not in self.KINDS:
+            raise InvalidValue(f"Kind must be one of {', '.join(self.KINDS)}")
+
+        # append keeps timestamps in order, so since is a binary search
+        start = 0 if since is None else bisect_left(self._timestamps, since)
+        code = None if kind is None else self.KINDS.index(kind)
+        found = 0
+        for index in range(start, len(self._kinds)):
+            if limit is not None and found >= limit:
+                return
+            if code is None or self._kinds[index] & self.KIND_MASK == code:
+                found += 1
+                yield self[index]
+
+
+class Ledger:
+    # append-only log of every account mutation. Each record goes to the OS
+    # with one write() before the change is applied, so a process crash
+    # loses nothing. fsync is batched: a record is on disk once sync_records
+    # more have been written or sync_interval seconds have passed, whichever
+    # comes first, so a power loss can cost at most that window
+    # pins are never logged, only the account's salt and the salted hash
+    # BankAccount keeps, which is all replay needs to check them later
+    MAGIC = b"BANKLOG2"
+    HEADER = struct.Struct("<IIB")       # crc32 of kind + payload, payload length, kind
+    OPEN = struct.Struct("<Qd16sQ")      # account id, balance, pin salt, pin hash, then the holder in utf-8
+    MOVE = struct.Struct("<Qdd")         # account id, amount, timestamp
+    PIN = struct.Struct("<QQ")           # account id, pin hash
+    TRANSFER = struct.Struct("<QQdd")    # from account id, to account id, amount, timestamp
+    KIND_OPEN, KIND_DEPOSIT, KIND_WITHDRAW, KIND_PIN, KIND_TRANSFER = 1, 2, 3, 4, 5
+    # like TransactionHistory, a high bit of the kind byte marks a balance or
+    # amount that was an int, so replay gives back ints where they went in
+    KIND_MASK, VALUE_INT = 0x3F, 0x40
+    # crc32 running value after the kind byte, so the payload is never copied to check it
+    KIND_CRC = [zlib.crc32(bytes((kind,))) for kind in range(256)]
+
+    def __init__(self, path, sync_interval=0.01, sync_records=256, next_id=1, recovering=False):
+        if sync_records < 1 or sync_interval < 0:
+            raise InvalidValue("Ledger needs sync_records >= 1 and sync_interval >= 0")
+        self.path = path
+        self.sync_interval = sync_interval
+        self.sync_records = sync_records
+        self._fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+        size = os.fstat(self._fd).st_size
+        if size == 0:
+            os.write(self._fd, self.MAGIC)
+            os.fsync(self._fd)
+        elif size > len(self.MAGIC) and not recovering:
+            os.close(self._fd)
+            raise InvalidValue(f"{path} already has records, open it with Ledger.recover")
+        self._next_id = next_id
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._written = 0
+        self._synced = 0
+        self._closed = threading.Event()
+        self._flusher = None
+        if sync_interval:
+            self._flusher = threading.Thread(target=self._flush_loop, daemon=True)
+            self._flusher.start()
+
+    def _flush_loop(self):
+        while not self._closed.wait(self.sync_interval):
+            self.sync()
+
+    def _append(self, kind, payload):
+        record = self.HEADER.pack(zlib.crc32(payload, self.KIND_CRC[kind]), len(payload), kind) + payload
+        with self._lock:
+            if self._fd is None:
+                raise InvalidValue("Ledger is closed")
+            os.write(self._fd, record)
+            self._written += 1
+            due = self._written - self._synced >= self.sync_records
+        if due:
+            self.sync()
+
+    def sync(self):
+        with self._sync_lock:
+            written = self._written
+            if written > self._synced and self._fd is not None:
+                getattr(os, "fdatasync", os.fsync)(self._fd)
+                self._synced = written
+
+    def close(self):
+        self._closed.set()
+        if self._flusher is not None:
+            self._flusher.join()
+        self.sync()
+        with self._lock, self._sync_lock:
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _kind(self, kind, value):
+        return kind | self.VALUE_INT if isinstance(value, int) else kind
+
+    def log_open(self, account_holder, balance, pin_salt, pin_hash):
+        with self._lock:
+            account_id = self._next_id
+            self._next_id += 1
+        self._append(self._kind(self.KIND_OPEN, balance),
+                     self.OPEN.pack(account_id, balance, pin_salt, pin_hash) + account_holder.encode("utf-8"))
+        return account_id
+
+    def log_deposit(self, account_id, amount, timestamp):
+        self._append(self._kind(self.KIND_DEPOSIT, amount), self.MOVE.pack(account_id, amount, timestamp))
+
+    def log_withdraw(self, account_id, amount, timestamp):
+        self._append(self._kind(self.KIND_WITHDRAW, amount), self.MOVE.pack(account_id, amount, timestamp))
+
+    def log_pin(self, account_id, pin_hash):
+        self._append(self.KIND_PIN, self.PIN.pack(account_id, pin_hash))
+
+    def log_transfer(self, from_id, to_id, amount, timestamp):
+        # one record for both sides, replay never sees half a transfer
+        self._append(self._kind(self.KIND_TRANSFER, amount),
+                     self.TRANSFER.pack(from_id, to_id, amount, timestamp))
+
+    @classmethod
+    def recover(cls, path, sync_interval=0.01, sync_records=256, thread_safe=False):
+        accounts = {}
+        data = b""
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                data = f.read()
+        if len(data) >= len(cls.MAGIC) and not data.startswith(cls.MAGIC):
+            raise InvalidValue(f"{path} is not a ledger file")
+
+        # records were validated when they were logged, so replay applies
+        # them straight to the accounts without going through deposit/withdraw
+        view = memoryview(data)
+        header, move = cls.HEADER, cls.MOVE
+        good = offset = len(cls.MAGIC) if len(data) >= len(cls.MAGIC) else 0
+        while offset + header.size <= len(data):
+            crc, length, code = header.unpack_from(view, offset)
+            start = offset + header.size
+            payload = view[start:start + length]
+            if len(payload) < length or zlib.crc32(payload, cls.KIND_CRC[code]) != crc:
+                break
+            kind, as_int = code & cls.KIND_MASK, code & cls.VALUE_INT
+            if kind == cls.KIND_OPEN:
+                account_id, balance, pin_salt, pin_hash = cls.OPEN.unpack_from(payload)
+                # the pin given here is replaced by the logged hash straight away
+                account = BankAccount(bytes(payload[cls.OPEN.size:]).decode("utf-8"),
+                                      int(balance) if as_int else balance, 0, thread_safe=thread_safe)
+                account._restore_pin(pin_salt, pin_hash)
+                account.account_id = account_id
+                accounts[account_id] = account
+            elif kind == cls.KIND_PIN:
+                account_id, pin_hash = cls.PIN.unpack_from(payload)
+                accounts[account_id]._restore_pin(None, pin_hash)
+            elif kind == cls.KIND_TRANSFER:
+                from_id, to_id, amount, timestamp = cls.TRANSFER.unpack_from(payload)
+                amount = int(amount) if as_int else amount
+                source, target = accounts[from_id], accounts[to_id]
+                source.balance -= amount
+                source._transaction_history.append("withdraw", amount, source.balance, timestamp)
+                target.balance += amount
+                target._transaction_history.append("deposit", amount, target.balance, timestamp)
+            else:
+                account_id, amount, timestamp = move.unpack_from(payload)
+                amount = int(amount) if as_int else amount
+                account = accounts[account_id]
+                if kind == cls.KIND_DEPOSIT:
+                    account.balance += amount
+                    account._transaction_history.append("deposit", amount, account.balance, timestamp)
+                else:
+                    account.balance -= amount
+                    account._transaction_history.append("withdraw", amount, account.balance, timestamp)
+            offset = good = start + length
+
+        # anything after the last whole record is a write cut short by a
+        # crash, it was never applied so it is dropped
+        view.release()
+        if good < len(data):
+            os.truncate(path, good)
+        ledger = cls(path, sync_interval, sync_records, next_id=max(accounts, default=0) + 1, recovering=True)
+        for account in accounts.values():
+            account._ledger = ledger
+        return ledger, accounts
+
+
+# accounts that are not thread safe share a lock that does nothing
+_NO_LOCK = contextlib.nullcontext()
+# creation order, transfer locks the older account first
+_account_order = itertools.count()
+
+
 class BankAccount:
-    def __init__(self, account_holder: str, balance: float, pin_code : int):
+    def __init__(self, account_holder: str, balance: float, pin_code : int, ledger: Ledger = None,
+                 thread_safe: bool = False):
         if not account_holder.strip():
             raise InvalidValue("Account holder must not be empty")
 
         self.account_holder = account_holder
         self.balance = self.validate_amount(balance)
-        self._transaction_history = []
+        self._transaction_history = TransactionHistory()
+        self._lock = threading.Lock() if thread_safe else _NO_LOCK
+        self._order = next(_account_order)
+        self._ledger = None
+        self.account_id = None
+        # only a salted hash of the pin is kept, and logged
+        self.__pin_salt = os.urandom(16)
         self.set_pin_code(pin_code)
+        if ledger is not None:
+            self.account_id = ledger.log_open(account_holder, self.balance, self.__pin_salt, self.__pin_hash)
+            self._ledger = ledger
+
+    def _hash_pin(self, pin):
+        if not isinstance(pin, int):
+            return None
+        digest = hashlib.blake2b(str(pin).encode(), digest_size=8, key=self.__pin_salt).digest()
+        return int.from_bytes(digest, "little")
+
+    def _restore_pin(self, pin_salt, pin_hash):
+        if pin_salt is not None:
+            self.__pin_salt = pin_salt
+        self.__pin_hash = pin_hash
 
     def set_pin_code(self, pin_code):
         if not isinstance(pin_code, (int)):
             raise InvalidValue("Pin is Invalid")
         else:
-            self.__pin_code = pin_code
+            pin_hash = self._hash_pin(pin_code)
+            with self._lock:
+                if self._ledger is not None:
+                    self._ledger.log_pin(self.account_id, pin_hash)
+                self.__pin_hash = pin_hash
 
     @staticmethod
     def validate_amount(amount):
@@ -27,49 +326,175 @@ class BankAccount:
 
     def deposit(self, amount):
         amount = self.validate_amount(amount)
-        self.balance += amount
-        self._transaction_history.append(f"Added: {amount}, current Balance : {self.balance}")
+        with self._lock:
+            timestamp = time.time()
+            if self._ledger is not None:
+                self._ledger.log_deposit(self.account_id, amount, timestamp)
+            self.balance += amount
+            self._transaction_history.append("deposit", amount, self.balance, timestamp)
 
     def withdraw(self, amount, pin):
         amount = self.validate_amount(amount)
-        if pin != self.__pin_code:
-            raise InvalidValue("Pin is Incorrect")
-        if amount > self.balance:
-            raise InvalidValue("Not enough balance")
-        else :
+        # the balance check and the update happen under one lock, two
+        # tellers cannot both see enough money and overdraw the account
+        with self._lock:
+            if self._hash_pin(pin) != self.__pin_hash:
+                raise InvalidValue("Pin is Incorrect")
+            if amount > self.balance:
+                raise InvalidValue("Not enough balance")
+            else :
+                timestamp = time.time()
+                if self._ledger is not None:
+                    self._ledger.log_withdraw(self.account_id, amount, timestamp)
+                self.balance -= amount
+                self._transaction_history.append("withdraw", amount, self.balance, timestamp)
+
+    def transfer(self, to, amount, pin):
+        amount = self.validate_amount(amount)
+        if to is self:
+            raise InvalidValue("Cannot transfer to the same account")
+        if to._ledger is not self._ledger:
+            raise InvalidValue("Both accounts must use the same ledger")
+
+        # every transfer takes the two locks in creation order, so transfers
+        # running in opposite directions can never wait on each other
+        first, second = sorted((self, to), key=lambda account: account._order)
+        with first._lock, second._lock:
+            if self._hash_pin(pin) != self.__pin_hash:
+                raise InvalidValue("Pin is Incorrect")
+            if amount > self.balance:
+                raise InvalidValue("Not enough balance")
+            timestamp = time.time()
+            if self._ledger is not None:
+                self._ledger.log_transfer(self.account_id, to.account_id, amount, timestamp)
             self.balance -= amount
-            self._transaction_history.append(f"Withdrew: {amount}, current Balance : {self.balance}")
+            self._transaction_history.append("withdraw", amount, self.balance, timestamp)
+            to.balance += amount
+            to._transaction_history.append("deposit", amount, to.balance, timestamp)
 
     def show_balance(self, pin):
-        if pin != self.__pin_code:
+        if self._hash_pin(pin) != self.__pin_hash:
             raise InvalidValue("Pin is Incorrect")
         else:
             print(f"Balance : {self.balance}")
 
-    def show_transactions(self):
-        print(self._transaction_history)
+    def transactions(self, since=None, kind=None, limit=None):
+        return self._transaction_history.select(since, kind, limit)
+
+    def show_transactions(self, since=None, kind=None, limit=None):
+        for transaction in self.transactions(since, kind, limit):
+            print(transaction)
 
     @classmethod
-    def from_string(cls, string_data: str) :
+    def from_string(cls, string_data: str, ledger: Ledger = None, thread_safe: bool = False) :
         try:
             account_holder, balance, pin = string_data.split(',')
             balance = float(balance)
             pin = int(pin)
-            return cls(account_holder, balance, pin)
+            return cls(account_holder, balance, pin, ledger, thread_safe)
         except ValueError:
             raise InvalidValue("Input string must be: 'name,balance,pin'")
-    
-    
 
-acc1 = BankAccount("Rana", 1790 , 2324)
-acc2 = BankAccount.from_string("Rana,1790,2324")
+    @classmethod
+    def iter_from_lines(cls, lines, errors: list = None, processes: int = 1, chunk_lines: int = 50000,
+                        ledger: Ledger = None, thread_safe: bool = False, strict: bool = False):
+        # one account per 'name,balance,pin' line. Bad lines are skipped and
+        # loading carries on, pass a list as errors to get them back as
+        # (line number, line, message). strict stops at the first bad line
+        # like from_string, after yielding every good line before it
+        chunks = _line_chunks(lines, chunk_lines)
+        if processes > 1:
+            parsed = _parse_in_pool(chunks, processes)
+        else:
+            parsed = (parse_account_lines(chunk, first_line) for first_line, chunk in chunks)
+        for records, chunk_errors in parsed:
+            first_bad = chunk_errors[0][0] if strict and chunk_errors else None
+            for line_number, account_holder, balance, pin in records:
+                if first_bad is not None and line_number > first_bad:
+                    break
+                yield cls(account_holder, balance, pin, ledger, thread_safe)
+            if first_bad is not None:
+                if errors is not None:
+                    errors.append(chunk_errors[0])
+                raise InvalidValue(f"Line {first_bad}: {chunk_errors[0][2]}")
+            if errors is not None:
+                errors.extend(chunk_errors)
+
+    @classmethod
+    def from_file(cls, path, errors: list = None, processes: int = 1, chunk_lines: int = 50000,
+                  ledger: Ledger = None, thread_safe: bool = False, strict: bool = False):
+        with open(path, encoding="utf-8", newline="", buffering=1 << 20) as f:
+            yield from cls.iter_from_lines(f, errors, processes, chunk_lines, ledger, thread_safe, strict)
+
+
+def parse_account_lines(lines, first_line: int = 1):
+    # checks each line the way from_string and the constructor would, but
+    # returns plain tuples so a worker process can send them back cheaply.
+    # Plain lines are split directly, only quoted ones go through csv, one
+    # line at a time so a stray quote cannot swallow the lines after it.
+    # float and int ignore the trailing newline, so lines are only
+    # stripped when they are reported
+    records, errors = [], []
+    append = records.append
+    for line_number, line in enumerate(lines, first_line):
+        row = next(csv.reader((line,))) if '"' in line else line.split(",")
+        try:
+            account_holder, balance, pin = row
+            balance = float(balance)
+            pin = int(pin)
+        except ValueError:
+            if line.strip():
+                errors.append((line_number, line.rstrip("\r\n"), "Input string must be: 'name,balance,pin'"))
+            continue
+        if balance <= 0:
+            errors.append((line_number, line.rstrip("\r\n"), "Amount must be greater than zero"))
+        elif not account_holder.strip():
+            errors.append((line_number, line.rstrip("\r\n"), "Account holder must not be empty"))
+        else:
+            append((line_number, account_holder, balance, pin))
+    return records, errors
+
+
+def _line_chunks(lines, chunk_lines):
+    lines = iter(lines)
+    first_line = 1
+    while True:
+        chunk = list(itertools.islice(lines, chunk_lines))
+        if not chunk:
+            return
+        yield first_line, chunk
+        first_line += len(chunk)
+
+
+def _parse_chunk(job):
+    first_line, chunk = job
+    return parse_account_lines(chunk, first_line)
+
+
+def _parse_in_pool(chunks, processes):
+    # a few chunks in flight per worker, not the whole file, and results
+    # come back in file order
+    with ProcessPoolExecutor(processes) as pool:
+        pending = deque()
+        for job in chunks:
+            pending.append(pool.submit(_parse_chunk, job))
+            if len(pending) >= processes * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+
+if __name__ == "__main__":
+    acc1 = BankAccount("Rana", 1790 , 2324)
+    acc2 = BankAccount.from_string("Rana,1790,2324")
 
-acc1.deposit(10)
-acc1.withdraw(100, 2324)
-acc1.show_transactions()
-acc1.show_balance(2324)
+    acc1.deposit(10)
+    acc1.withdraw(100, 2324)
+    acc1.show_transactions()
+    acc1.show_balance(2324)
 
-acc2.deposit(10)
-acc2.withdraw(100, 2324)
-acc2.show_transactions()
-acc2.show_balance(2324)
\ No newline at end of file
+    acc2.deposit(10)
+    acc2.withdraw(100, 2324)
+    acc2.show_transactions()
+    acc2.show_balance(2324)
\ No newline at end of file
@@ -0,0 +1,80 @@
+# Memory and time for transaction history: the old list of formatted
+# strings against the typed columns in TransactionHistory, for accounts with
+# a million entries each.
+#
+#   python3 benchmarks/bench_history.py --entries 1000000 --accounts 2
+
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from bank import BankAccount
+
+
+class StringHistoryAccount(BankAccount):
+    # the previous behaviour, kept here only to compare against
+    def __init__(self, *args):
+        super().__init__(*args)
+        self._transaction_history = []
+
+    def deposit(self, amount):
+        amount = self.validate_amount(amount)
+        self.balance += amount
+        self._transaction_history.append(f"Added: {amount}, current Balance : {self.balance}")
+
+    def withdraw(self, amount, pin):
+        amount = self.validate_amount(amount)
+        self.balance -= amount
+        self._transaction_history.append(f"Withdrew: {amount}, current Balance : {self.balance}")
+
+
+def fill(cls, accounts, entries):
+    tracemalloc.start()
+    start = time.perf_counter()
+    made = []
+    for number in range(accounts):
+        account = cls(f"Holder {number}", 1000.0, 1234)
+        for i in range(entries):
+            if i % 4 == 3:
+                account.withdraw(1.25, 1234)
+            else:
+                account.deposit(2.5)
+        made.append(account)
+    elapsed = time.perf_counter() - start
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return made, size, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--entries", type=int, default=1000000, help="transactions per account")
+    parser.add_argument("--accounts", type=int, default=1)
+    args = parser.parse_args()
+    total = args.entries * args.accounts
+
+    print(f"{args.accounts} accounts x {args.entries:,} transactions\n")
+    print(f"{'':<16}{'MiB':>10}{'bytes/entry':>14}{'us/op':>10}")
+    for label, cls in (("strings", StringHistoryAccount), ("columns", BankAccount)):
+        made, size, elapsed = fill(cls, args.accounts, args.entries)
+        print(f"{label:<16}{size / 2**20:>10,.1f}{size / total:>14,.1f}{elapsed * 1e6 / total:>10.2f}")
+        del made
+
+    account = fill(BankAccount, 1, args.entries)[0][0]
+    middle = account._transaction_history[args.entries // 2].timestamp
+    for label, query in (
+            ("all withdrawals", lambda: list(account.transactions(kind="withdraw"))),
+            ("since midpoint, 100", lambda: list(account.transactions(since=middle, limit=100))),
+            ("withdrawals, 100", lambda: list(account.transactions(kind="withdraw", limit=100)))):
+        start = time.perf_counter()
+        query()
+        print(f"{label:<24}{(time.perf_counter() - start) * 1e3:>10.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+# Deposit/withdraw throughput with no ledger, with one fsync per record and
+# with group commit, then how long recovery takes to replay the log.
+#
+#   python3 benchmarks/bench_ledger.py --ops 200000 --accounts 1000
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from bank import BankAccount, Ledger
+
+
+def run(ledger, accounts, ops):
+    made = [BankAccount(f"Holder {n}", 1000.0, 1234, ledger) for n in range(accounts)]
+    start = time.perf_counter()
+    for i in range(ops):
+        account = made[i % accounts]
+        if i % 3 == 2:
+            account.withdraw(1.25, 1234)
+        else:
+            account.deposit(2.5)
+    if ledger is not None:
+        ledger.close()
+    return ops / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--ops", type=int, default=200000)
+    parser.add_argument("--accounts", type=int, default=1000)
+    parser.add_argument("--fsync-ops", type=int, default=2000, help="ops for the fsync per record run")
+    parser.add_argument("--sync-interval", type=float, default=0.01)
+    parser.add_argument("--sync-records", type=int, default=256)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        runs = (
+            ("memory only", None, args.ops),
+            ("fsync per record", (0, 1), args.fsync_ops),
+            (f"group commit {args.sync_interval * 1000:g}ms/{args.sync_records}",
+             (args.sync_interval, args.sync_records), args.ops),
+        )
+        for number, (label, sync, ops) in enumerate(runs):
+            ledger = None
+            if sync:
+                ledger = Ledger(os.path.join(tmp_dir, f"ledger{number}.bin"), *sync)
+            print(f"{label:<28}{run(ledger, args.accounts, ops):>12,.0f} ops/s")
+
+        path = os.path.join(tmp_dir, f"ledger{len(runs) - 1}.bin")
+        start = time.perf_counter()
+        ledger, accounts = Ledger.recover(path)
+        elapsed = time.perf_counter() - start
+        ledger.close()
+        records = args.ops + args.accounts
+        print(f"\nreplayed {records:,} records ({os.path.getsize(path) / 2**20:.1f} MiB) "
+              f"in {elapsed:.2f}s, {records / elapsed:,.0f} records/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+# Bulk loading 'name,balance,pin' lines: a from_string loop against the
+# streaming from_file, in one process and fanned out to a process pool.
+# About 1% of the generated lines are bad and must be reported, not fatal.
+# Every 50th holder is quoted with a comma inside, which from_string rejects.
+#
+#   python3 benchmarks/bench_loader.py --lines 10000000 --processes 4
+
+import argparse
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from bank import BankAccount, InvalidValue, _line_chunks, parse_account_lines
+
+BAD_LINES = ("no commas here", "Name,-10,1234", ",50,1234", "Name,12abc,1234", "Name,10,12.5")
+
+
+def write_input(path, lines, seed):
+    rng = random.Random(seed)
+    with open(path, "w", encoding="utf-8", buffering=1 << 20) as f:
+        for number in range(lines):
+            if rng.random() < 0.01:
+                f.write(rng.choice(BAD_LINES) + "\n")
+            elif number % 50 == 0:
+                f.write(f'"Holder, {number}",{rng.randint(1, 10**6) / 100},{rng.randint(0, 9999)}\n')
+            else:
+                f.write(f"Holder {number},{rng.randint(1, 10**6) / 100},{rng.randint(0, 9999)}\n")
+
+
+def from_string_loop(path):
+    loaded = bad = 0
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                BankAccount.from_string(line.rstrip("\n"))
+                loaded += 1
+            except InvalidValue:
+                bad += 1
+    return loaded, bad
+
+
+def parse_only(path):
+    loaded = bad = 0
+    with open(path, encoding="utf-8", newline="", buffering=1 << 20) as f:
+        for first_line, chunk in _line_chunks(f, 50000):
+            records, errors = parse_account_lines(chunk, first_line)
+            loaded += len(records)
+            bad += len(errors)
+    return loaded, bad
+
+
+def from_file(path, processes):
+    errors = []
+    loaded = sum(1 for _ in BankAccount.from_file(path, errors, processes=processes))
+    return loaded, len(errors)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--lines", type=int, default=10000000)
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--seed", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "accounts.csv")
+        write_input(path, args.lines, args.seed)
+        print(f"{args.lines:,} lines, {os.path.getsize(path) / 2**20:,.0f} MiB\n")
+
+        runs = [
+            ("from_string loop", lambda: from_string_loop(path)),
+            ("parse only", lambda: parse_only(path)),
+            ("from_file", lambda: from_file(path, 1)),
+        ]
+        if args.processes > 1:
+            runs.append((f"from_file, {args.processes} processes", lambda: from_file(path, args.processes)))
+        for label, run in runs:
+            start = time.perf_counter()
+            loaded, bad = run()
+            elapsed = time.perf_counter() - start
+            print(f"{label:<28}{elapsed:>8.1f}s {args.lines / elapsed:>12,.0f} lines/s"
+                  f"   {loaded:,} loaded, {bad:,} bad")
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"\npeak RSS {peak:,.0f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+# BankAccount objects against the columnar AccountStore: memory for N
+# accounts, a payroll batch (one deposit per account) and a mixed batch of
+# random deposits and withdrawals.
+#
+#   python3 benchmarks/bench_store.py --accounts 1000000
+
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from account_store import AccountStore
+from bank import BankAccount, InvalidValue
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def traced(fn):
+    tracemalloc.start()
+    result = fn()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, size
+
+
+def post_objects(accounts, ids, amounts, withdraw):
+    rejects = 0
+    for account_id, amount, out in zip(ids, amounts, withdraw):
+        try:
+            if out:
+                accounts[account_id].withdraw(amount, 1234)
+            else:
+                accounts[account_id].deposit(amount)
+        except InvalidValue:
+            rejects += 1
+    return rejects
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--accounts", type=int, default=1000000)
+    parser.add_argument("--rows", type=int, default=1000000, help="rows in the mixed batch")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+    n = args.accounts
+
+    holders = [f"Holder {i}" for i in range(n)]
+    balances = [rng.randint(1, 5000) for _ in range(n)]
+    objects, object_bytes = traced(lambda: [BankAccount(h, b, 1234) for h, b in zip(holders, balances)])
+
+    def build_store():
+        store = AccountStore(n)
+        store.open_accounts(holders, balances, [1234] * n)
+        return store
+
+    store, store_bytes = traced(build_store)
+    print(f"{n:,} accounts")
+    print(f"  objects  {object_bytes / 2**20:>10,.1f} MiB  {object_bytes / n:>8,.0f} bytes/account")
+    print(f"  store    {store_bytes / 2**20:>10,.1f} MiB  {store_bytes / n:>8,.0f} bytes/account")
+
+    payroll = [2500.0] * n
+    ids = list(range(n))
+    _, loop = timed(lambda: post_objects(objects, ids, payroll, [False] * n))
+    _, batch = timed(lambda: store.apply_batch(np.arange(n), payroll))
+    print(f"\npayroll, {n:,} deposits")
+    print(f"  deposit() loop  {loop:>8.2f}s  {n / loop:>14,.0f} rows/s")
+    print(f"  apply_batch     {batch:>8.2f}s  {n / batch:>14,.0f} rows/s  ({loop / batch:.0f}x)")
+
+    mixed_ids = [rng.randrange(n) for _ in range(args.rows)]
+    # about 1% of rows carry a zero amount and must be rejected
+    amounts = [0 if rng.random() < 0.01 else rng.randint(1, 900000) / 100 for _ in range(args.rows)]
+    withdraw = [rng.random() < 0.4 for _ in range(args.rows)]
+    rejects, loop = timed(lambda: post_objects(objects, mixed_ids, amounts, withdraw))
+    result, batch = timed(lambda: store.apply_batch(mixed_ids, amounts, withdraw))
+    print(f"\nmixed, {args.rows:,} rows, 40% withdrawals")
+    print(f"  deposit()/withdraw() loop  {loop:>8.2f}s  {args.rows / loop:>12,.0f} rows/s  {rejects:,} rejected")
+    print(f"  apply_batch                {batch:>8.2f}s  {args.rows / batch:>12,.0f} rows/s  "
+          f"{int((~result.applied).sum()):,} rejected  ({loop / batch:.0f}x)")
+
+    drift = sum(abs(round(o.balance * 100) - int(c)) for o, c in zip(objects, store._balances[:n]))
+    print(f"\nbalances differing between the two paths: {drift} cents in total")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+# Many teller threads hammering shared accounts with deposits, withdrawals
+# and transfers. Checks that no account ever went negative and that the total
+# moves by exactly the net of what the threads deposited and withdrew, then
+# reports ops/sec, with and without thread_safe. With --ledger every
+# mutation also goes through a Ledger, whose write() releases the GIL between
+# the balance check and the update, the way real I/O in a teller would.
+#
+#   python3 benchmarks/bench_threads.py --threads 16 --accounts 100 --ops 20000
+#   python3 benchmarks/bench_threads.py --accounts 4 --ledger
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from bank import BankAccount, InvalidValue, Ledger
+
+PIN = 1234
+
+
+def teller(accounts, ops, seed, net, start):
+    rng = random.Random(seed)
+    moved = 0
+    start.wait()
+    for _ in range(ops):
+        account = rng.choice(accounts)
+        roll = rng.random()
+        try:
+            if roll < 0.3:
+                amount = rng.randint(1, 50)
+                account.deposit(amount)
+                moved += amount
+            elif roll < 0.6:
+                amount = rng.randint(1, 80)
+                account.withdraw(amount, PIN)
+                moved -= amount
+            else:
+                other = rng.choice(accounts)
+                if other is not account:
+                    account.transfer(other, rng.randint(1, 80), PIN)
+        except InvalidValue:
+            pass
+    net.append(moved)
+
+
+def run(thread_safe, threads, count, ops, switch_interval, ledger=None):
+    accounts = [BankAccount(f"Holder {n}", 100, PIN, ledger, thread_safe) for n in range(count)]
+    opening = sum(account.balance for account in accounts)
+    net, start = [], threading.Event()
+    workers = [threading.Thread(target=teller, args=(accounts, ops, seed, net, start)) for seed in range(threads)]
+    for worker in workers:
+        worker.start()
+    previous = sys.getswitchinterval()
+    # switching threads far more often than the default makes the races of
+    # the unlocked path show up in a short run
+    sys.setswitchinterval(switch_interval)
+    began = time.perf_counter()
+    start.set()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - began
+    sys.setswitchinterval(previous)
+
+    drift = sum(account.balance for account in accounts) - (opening + sum(net))
+    # an overdraft can be paid back before the run ends, the history shows it
+    negative = sum(any(t.balance_after < 0 for t in account.transactions()) for account in accounts)
+    return threads * ops / elapsed, drift, negative
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--accounts", type=int, default=100)
+    parser.add_argument("--ops", type=int, default=20000, help="operations per thread")
+    parser.add_argument("--switch-interval", type=float, default=1e-6)
+    parser.add_argument("--ledger", action="store_true", help="log every mutation to a temporary ledger")
+    args = parser.parse_args()
+
+    print(f"{args.threads} threads x {args.ops:,} ops over {args.accounts} accounts"
+          f"{' with a ledger' if args.ledger else ''}\n")
+    for label, thread_safe in (("unlocked", False), ("thread_safe", True)):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            ledger = Ledger(os.path.join(tmp_dir, "ledger.bin")) if args.ledger else None
+            rate, drift, negative = run(
+                thread_safe, args.threads, args.accounts, args.ops, args.switch_interval, ledger)
+            if ledger is not None:
+                ledger.close()
+        verdict = "conserved, never overdrawn" if drift == 0 and not negative else f"drift {drift}, {negative} accounts overdrawn"
+        print(f"{label:<14}{rate:>12,.0f} ops/s   {verdict}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from account_store import AccountStore, BatchResult
+from bank import InvalidValue
+
+
+def sequential(balances, account_ids, amounts, withdraw):
+    # what deposit and withdraw would do one row at a time
+    balances = list(balances)
+    status = []
+    for account_id, cents, out in zip(account_ids, AccountStore.to_cents(amounts).tolist(), withdraw):
+        if cents <= 0:
+            status.append(BatchResult.INVALID_AMOUNT)
+        elif not 0 <= account_id < len(balances):
+            status.append(BatchResult.UNKNOWN_ACCOUNT)
+        elif out and balances[account_id] < cents:
+            status.append(BatchResult.NOT_ENOUGH_BALANCE)
+        else:
+            balances[account_id] += -cents if out else cents
+            status.append(BatchResult.OK)
+    return balances, status
+
+
+def check(store, account_ids, amounts, withdraw):
+    before = store._balances[:len(store)].tolist()
+    expected_balances, expected_status = sequential(
+        before, account_ids, amounts, [False] * len(account_ids) if withdraw is None else withdraw)
+    result = store.apply_batch(account_ids, amounts, withdraw)
+    assert result.status.tolist() == expected_status
+    assert store._balances[:len(store)].tolist() == expected_balances
+    return result
+
+
+def make_store(balances):
+    store = AccountStore(capacity=2)
+    store.open_accounts([f"holder {i}" for i in range(len(balances))], balances, list(range(len(balances))))
+    return store
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_mixed_batch_matches_sequential(seed):
+    rng = np.random.default_rng(seed)
+    store = make_store(rng.uniform(1, 50, size=20).round(2))
+    rows = 2000
+    account_ids = rng.integers(-2, 22, size=rows)
+    amounts = rng.uniform(-5, 40, size=rows).round(2)
+    amounts[rng.random(rows) < 0.02] = np.nan
+    amounts[rng.random(rows) < 0.02] = np.inf
+    withdraw = rng.random(rows) < 0.6
+    check(store, account_ids, amounts, withdraw)
+
+
+def test_repeated_ids_see_earlier_rows():
+    store = make_store([10])
+    # the second withdrawal only fits after the deposit between them
+    result = check(store, [0, 0, 0, 0], [8, 5, 4, 3], [True, True, False, True])
+    assert result.status.tolist() == [BatchResult.OK, BatchResult.NOT_ENOUGH_BALANCE,
+                                      BatchResult.OK, BatchResult.OK]
+
+
+def test_invalid_amounts_and_unknown_ids_are_skipped():
+    store = make_store([10, 10])
+    result = check(store, [0, 1, 2, -1, 1], [0, -3, 5, 5, 2], [False, True, False, True, True])
+    assert list(result.rejects()) == [
+        (0, 0, "Amount must be greater than zero"),
+        (1, 1, "Amount must be greater than zero"),
+        (2, 2, "Unknown account"),
+        (3, -1, "Unknown account"),
+    ]
+
+
+def test_deposits_only():
+    store = make_store([1, 2, 3])
+    check(store, [2, 0, 2, 1], [1.5, 2, 0.25, 9], None)
+
+
+def test_many_shortfalls_fall_back_to_row_by_row():
+    # every failing withdrawal changes the running balance of the rows after
+    # it, so this needs one round per failure, more than BATCH_ROUNDS
+    store = make_store([1, 100])
+    failures = AccountStore.BATCH_ROUNDS * 3
+    account_ids, amounts, withdraw = [], [], []
+    for _ in range(failures):
+        account_ids += [0, 0, 1]
+        amounts += [5, 1, 1]
+        withdraw += [True, False, True]
+    result = check(store, account_ids, amounts, withdraw)
+    assert (result.status == BatchResult.NOT_ENOUGH_BALANCE).sum() > AccountStore.BATCH_ROUNDS
+
+
+def test_mismatched_lengths():
+    store = make_store([1])
+    with pytest.raises(InvalidValue):
+        store.apply_batch([0, 0], [1])
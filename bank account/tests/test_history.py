@@ -0,0 +1,16 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bank import TransactionHistory
+
+
+def test_timestamps_never_go_down():
+    history = TransactionHistory()
+    # the clock stepped back between the second and third entries
+    for amount, timestamp in ((1, 100.0), (2, 200.0), (3, 150.0), (4, 250.0)):
+        history.append("deposit", amount, amount, timestamp)
+    assert [t.timestamp for t in history] == [100.0, 200.0, 200.0, 250.0]
+    assert [t.amount for t in history.select(since=200.0)] == [2, 3, 4]
+    assert [t.amount for t in history.select(since=201.0)] == [4]
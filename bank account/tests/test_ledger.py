@@ -0,0 +1,138 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bank import BankAccount, InvalidValue, Ledger
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "ledger.bin")
+
+
+def test_replay_rebuilds_accounts(path):
+    with Ledger(path, sync_interval=0) as ledger:
+        rana = BankAccount("Rana", 100, 1111, ledger)
+        omar = BankAccount.from_string("Omar,50,2222", ledger)
+        rana.deposit(25)
+        omar.withdraw(20, 2222)
+        rana.set_pin_code(3333)
+        rana.transfer(omar, 40, 3333)
+
+    ledger, accounts = Ledger.recover(path)
+    try:
+        assert sorted(accounts) == [rana.account_id, omar.account_id]
+        assert accounts[rana.account_id].account_holder == "Rana"
+        assert accounts[rana.account_id].balance == 85
+        assert accounts[omar.account_id].balance == 70
+        assert [t.kind for t in accounts[omar.account_id].transactions()] == ["withdraw", "deposit"]
+        accounts[rana.account_id].withdraw(5, 3333)
+        with pytest.raises(InvalidValue):
+            accounts[rana.account_id].withdraw(5, 1111)
+        assert BankAccount("New", 1, 1, ledger).account_id == omar.account_id + 1
+    finally:
+        ledger.close()
+
+    ledger, accounts = Ledger.recover(path)
+    ledger.close()
+    assert accounts[rana.account_id].balance == 80
+    assert len(accounts) == 3
+
+
+def test_replay_keeps_ints_and_floats(path):
+    with Ledger(path, sync_interval=0) as ledger:
+        whole = BankAccount("Rana", 100, 1111, ledger)
+        whole.deposit(25)
+        cents = BankAccount("Omar", 10.5, 2222, ledger)
+        cents.deposit(2)
+        whole.transfer(cents, 5, 1111)
+
+    ledger, accounts = Ledger.recover(path)
+    ledger.close()
+    assert type(accounts[whole.account_id].balance) is int
+    assert accounts[whole.account_id].balance == 120
+    assert type(accounts[cents.account_id].balance) is float
+    assert [t.amount for t in accounts[cents.account_id].transactions()] == [2, 5]
+    assert str(next(accounts[whole.account_id].transactions())) == str(next(whole.transactions()))
+
+
+def test_pins_are_not_logged(path):
+    with Ledger(path, sync_interval=0) as ledger:
+        account = BankAccount("Rana", 100, 482913, ledger)
+        account.set_pin_code(771204)
+    with open(path, "rb") as f:
+        data = f.read()
+    for pin in (482913, 771204):
+        assert pin.to_bytes(8, "little") not in data
+        assert str(pin).encode() not in data
+
+    ledger, accounts = Ledger.recover(path)
+    try:
+        accounts[account.account_id].withdraw(1, 771204)
+        with pytest.raises(InvalidValue):
+            accounts[account.account_id].withdraw(1, 482913)
+    finally:
+        ledger.close()
+
+
+def test_torn_tail_is_truncated(path):
+    with Ledger(path, sync_interval=0) as ledger:
+        account = BankAccount("Rana", 100, 1111, ledger)
+        account.deposit(10)
+    whole = os.path.getsize(path)
+    with open(path, "ab") as f:
+        # a deposit record cut short by a crash mid-write
+        f.write(Ledger.HEADER.pack(0, Ledger.MOVE.size, Ledger.KIND_DEPOSIT) + b"\x01\x02")
+
+    ledger, accounts = Ledger.recover(path)
+    ledger.close()
+    assert accounts[account.account_id].balance == 110
+    assert os.path.getsize(path) == whole
+
+
+def test_corrupt_record_stops_replay(path):
+    with Ledger(path, sync_interval=0) as ledger:
+        account = BankAccount("Rana", 100, 1111, ledger)
+        account.deposit(10)
+        account.deposit(20)
+    with open(path, "r+b") as f:
+        f.seek(-1, os.SEEK_END)
+        f.write(b"\xff")
+
+    ledger, accounts = Ledger.recover(path)
+    ledger.close()
+    assert accounts[account.account_id].balance == 110
+
+
+def test_empty_ledger_recovers(path):
+    Ledger(path).close()
+    ledger, accounts = Ledger.recover(path)
+    try:
+        assert accounts == {}
+        assert BankAccount("Rana", 100, 1111, ledger).account_id == 1
+    finally:
+        ledger.close()
+
+
+def test_missing_ledger_recovers(path):
+    ledger, accounts = Ledger.recover(path)
+    ledger.close()
+    assert accounts == {}
+    assert os.path.getsize(path) == len(Ledger.MAGIC)
+
+
+def test_existing_records_need_recover(path):
+    with Ledger(path) as ledger:
+        BankAccount("Rana", 100, 1111, ledger)
+    with pytest.raises(InvalidValue):
+        Ledger(path)
+
+
+def test_not_a_ledger(path):
+    with open(path, "wb") as f:
+        f.write(b"name,balance,pin\n")
+    with pytest.raises(InvalidValue):
+        Ledger.recover(path)
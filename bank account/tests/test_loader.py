@@ -0,0 +1,46 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bank import BankAccount, InvalidValue
+
+LINES = ["a,1,1\n", "b,2,2\n", "bad\n", "c,3,3\n", '"d, e",4,4\n', "f,-1,6\n"]
+
+
+def holders(accounts):
+    return [account.account_holder for account in accounts]
+
+
+@pytest.mark.parametrize("chunk_lines", [1, 2, 50000])
+def test_bad_lines_are_collected(chunk_lines):
+    errors = []
+    accounts = BankAccount.iter_from_lines(LINES, errors, chunk_lines=chunk_lines)
+    assert holders(accounts) == ["a", "b", "c", "d, e"]
+    assert [(number, line) for number, line, _ in errors] == [(3, "bad"), (6, "f,-1,6")]
+
+
+def test_bad_lines_are_skipped_without_errors_list():
+    assert holders(BankAccount.iter_from_lines(LINES)) == ["a", "b", "c", "d, e"]
+
+
+@pytest.mark.parametrize("chunk_lines", [1, 2, 50000])
+def test_strict_yields_lines_before_the_first_bad_one(chunk_lines):
+    loaded = []
+    with pytest.raises(InvalidValue, match="Line 3"):
+        for account in BankAccount.iter_from_lines(LINES, chunk_lines=chunk_lines, strict=True):
+            loaded.append(account)
+    assert holders(loaded) == ["a", "b"]
+
+
+def test_process_pool_matches(tmp_path):
+    path = tmp_path / "accounts.csv"
+    path.write_text("".join(LINES * 50), encoding="utf-8")
+    errors, pooled_errors = [], []
+    single = holders(BankAccount.from_file(str(path), errors, chunk_lines=7))
+    pooled = holders(BankAccount.from_file(str(path), pooled_errors, processes=2, chunk_lines=7))
+    assert single == pooled
+    assert errors == pooled_errors
+    assert len(errors) == 100